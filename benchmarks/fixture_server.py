@@ -0,0 +1,186 @@
+"""Local HTTP server serving the benchmark fixtures.
+
+The fixtures are synthetic, not recordings: the feeds are generated Google
+News RSS (real layout, made-up items) and there is one hand-written page per
+outlet, built to the structure of the site extractors' selectors, with
+identical filler. The pages measure speed, and show whether every extractor
+and the generic fallback run; they say nothing about extraction accuracy on
+real pages.
+
+It answers the Google News RSS searches on 127.0.0.1 and acts as an HTTP
+proxy for the publisher sites: articles resolve to http://<publisher host>/...
+so per-host limits, domain health and site extractors behave as they do
+against the real sites. Publication dates are shifted so the feeds
+always look fresh to the 24h filter.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import threading
+import email.utils
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+ITEM_RE = re.compile(r'<item>.*?</item>', re.S)
+PUBDATE_RE = re.compile(r'<pubDate>(.*?)</pubDate>')
+SOURCE_RE = re.compile(r'<source url="([^"]*)">(.*?)</source>')
+ARTICLE_ID_RE = re.compile(r'/rss/articles/([A-Za-z0-9_-]+)')
+
+
+class FixtureServer:
+    """Serve the fixture feeds and publisher pages with simulated latency.
+
+    Point requests at it with HTTP_PROXY=server.proxy_url and NO_PROXY=127.0.0.1.
+    """
+
+    def __init__(self, feed_latency=0.03, page_latency=0.05, fixture_dir=FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+        self.feed_latency = feed_latency
+        self.page_latency = page_latency
+        with open(os.path.join(fixture_dir, 'fixtures.json'), 'r', encoding='utf-8') as f:
+            self.spec = json.load(f)
+        self.feeds = {}           # keyword -> feed bytes (dates shifted)
+        self.article_pages = {}   # article id -> page name
+        self.article_hosts = {}   # article id -> publisher host
+        self.pages = {}           # page name -> html bytes
+        self.httpd = None
+        self.requests = {'feed': 0, 'page': 0}
+
+    def _read(self, name):
+        with open(os.path.join(self.fixture_dir, name), 'rb') as f:
+            return f.read()
+
+    def _shift_dates(self, xml, delta):
+        """Move every pubDate forward by delta, as if the feed had just been generated."""
+        def shift(match):
+            published = email.utils.parsedate_to_datetime(match.group(1)) + delta
+            return f"<pubDate>{email.utils.format_datetime(published, usegmt=True)}</pubDate>"
+        return PUBDATE_RE.sub(shift, xml)
+
+    def _page_for(self, article_id, source):
+        if zlib.crc32(article_id.encode()) % self.spec['consent_every'] == 0:
+            return self.spec['consent_page']
+        return self.spec['publishers'].get(source, self.spec['default_page'])
+
+    def load(self, keywords):
+        """Build one feed per keyword.
+
+        Keywords without a feed of their own reuse one of the fixture feeds with new
+        article ids, so every search returns a full feed.
+        """
+        delta = datetime.now(timezone.utc) - datetime.fromisoformat(self.spec['generated_at'])
+        fixture_feeds = {keyword: self._read(name).decode('utf-8') for keyword, name in self.spec['feeds'].items()}
+        names = sorted(fixture_feeds)
+        for i, keyword in enumerate(keywords):
+            if keyword in fixture_feeds:
+                xml = fixture_feeds[keyword]
+            else:
+                tag = format(zlib.crc32(keyword.encode('utf-8')), 'x')
+                xml = fixture_feeds[names[i % len(names)]].replace('/rss/articles/CBMi', f'/rss/articles/CBMi{tag}')
+                xml = xml.replace('<guid isPermaLink="false">CBMi', f'<guid isPermaLink="false">CBMi{tag}')
+            xml = self._shift_dates(xml, delta)
+            for item in ITEM_RE.findall(xml):
+                article_id = ARTICLE_ID_RE.search(item).group(1)
+                source = SOURCE_RE.search(item)
+                source_url, source_name = source.groups() if source else ('https://example.com', '')
+                self.article_pages[article_id] = self._page_for(article_id, source_name)
+                self.article_hosts[article_id] = urlparse(source_url).netloc
+            self.feeds[keyword] = xml.encode('utf-8')
+        for name in set(self.article_pages.values()):
+            self.pages[name] = self._read(name)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if not url.netloc and url.path == '/rss':
+                    keyword = parse_qs(url.query).get('q', [''])[0]
+                    if keyword in server.feeds:
+                        server.requests['feed'] += 1
+                        time.sleep(server.feed_latency)
+                        return self._send(server.feeds[keyword], 'application/rss+xml; charset=utf-8')
+                elif url.netloc:
+                    # Proxied request for a publisher page: http://host/artikel/<id>
+                    article_id = url.path.rsplit('/', 1)[-1]
+                    if article_id in server.article_pages:
+                        server.requests['page'] += 1
+                        time.sleep(server.page_latency)
+                        return self._send(server.pages[server.article_pages[article_id]], 'text/html; charset=utf-8')
+                self.send_response(404)
+                self.end_headers()
+
+        return Handler
+
+    def start(self, keywords):
+        self.load(keywords)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    @property
+    def rss_url(self):
+        """Drop-in replacement for config.GOOGLE_NEWS_RSS_URL."""
+        return f"http://127.0.0.1:{self.httpd.server_port}/rss?q={{query}}&hl=de-AT&gl=AT&ceid=AT:de"
+
+    @property
+    def proxy_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def article_url(self, google_url):
+        """Map a Google News article link to its page on the publisher's host."""
+        match = ARTICLE_ID_RE.search(google_url)
+        if not match or match.group(1) not in self.article_pages:
+            return None
+        article_id = match.group(1)
+        return f"http://{self.article_hosts[article_id]}/artikel/{article_id}"
+
+
+class StubDecoder:
+    """Stand-in for googlenewsdecoder.new_decoderv1 that resolves to the fixture pages."""
+
+    def __init__(self, server, latency=0.02):
+        self.server = server
+        self.latency = latency
+
+    def __call__(self, url, interval=None):
+        time.sleep(self.latency)
+        decoded_url = self.server.article_url(url)
+        if decoded_url is None:
+            return {'status': False, 'message': 'unknown article'}
+        return {'status': True, 'decoded_url': decoded_url}
+
+
+class StubTranslator:
+    """Stand-in for GoogleTranslator: waits latency seconds per request and echoes the text."""
+    latency = 0.1
+
+    def __init__(self, source='auto', target='ko'):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        time.sleep(self.latency)
+        return text
@@ -0,0 +1,401 @@
+"""Offline benchmarks for every pipeline stage.
+
+Runs fetch_news, scrape_article_content, process_news, generate_site and
+generate_report against the synthetic fixtures in benchmarks/fixtures (see
+fixture_server.py), served from a local HTTP server. Google News decoding and translation are replaced by
+stubs with a fixed latency, so no network access is needed and runs are
+comparable between commits.
+
+Usage:
+    python benchmarks/run_benchmarks.py                  # compare with benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline  # record a new baseline
+    python benchmarks/run_benchmarks.py --stages fetch,scrape --repeat 5
+
+Everything runs in a temporary working directory (templates, styles and the
+font are copied there), so caches and output of the real site are untouched.
+"""
+import os
+import io
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import config
+import fetcher
+import processor
+from fetcher import NewsFetcher
+from processor import NewsProcessor
+from web_generator import WebGenerator
+from reporter import PDFReporter
+from history import HistoryStore
+from metrics import METRICS
+from extractors import EXTRACTORS
+from fixture_server import FixtureServer, StubDecoder, StubTranslator
+
+STAGES = ['fetch', 'scrape', 'process', 'site', 'site_warm', 'report']
+STAGE_LABELS = {
+    'fetch': 'fetch_news',
+    'scrape': 'scrape_article_content',
+    'process': 'process_news',
+    'site': 'generate_site',
+    'site_warm': 'generate_site (no changes)',
+    'report': 'generate_report',
+}
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+WORKDIR_FILES = ['templates', os.path.join('public', 'styles.css'), 'NanumGothic-Regular.ttf']
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def timed(fn, latencies):
+    """Wrap fn so every call appends its duration (seconds) to latencies."""
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    return wrapper
+
+
+def summarize(items, seconds, latencies):
+    return {
+        'items': items,
+        'seconds': round(seconds, 4),
+        'items_per_sec': round(items / seconds, 2) if seconds else 0.0,
+        'calls': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+class BenchmarkRunner:
+    def __init__(self, args):
+        self.args = args
+        self.results = {}
+        self.history_path = 'bench_history.log'
+
+    @contextlib.contextmanager
+    def quiet(self):
+        """Hide the pipeline's progress output unless --verbose is given."""
+        if self.args.verbose:
+            yield
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield
+
+    def bench_fetch(self):
+        latencies = []
+        total_items = 0
+        elapsed = 0.0
+        news_items = []
+        for _ in range(self.args.repeat):
+            news_fetcher = NewsFetcher(use_cache=False)
+            news_fetcher._fetch_feed = timed(news_fetcher._fetch_feed, latencies)
+            started = time.perf_counter()
+            with self.quiet():
+                news_items = news_fetcher.fetch_news()
+            elapsed += time.perf_counter() - started
+            total_items += len(news_items)
+        return news_items, summarize(total_items, elapsed, latencies)
+
+    def bench_scrape(self, news_items):
+        latencies = []
+        elapsed = 0.0
+        extracted = 0
+        for _ in range(self.args.repeat):
+            news_processor = NewsProcessor(use_cache=False)
+            scrape = timed(news_processor.scrape_article_content, latencies)
+            started = time.perf_counter()
+            with self.quiet():
+                for item in news_items:
+                    if scrape(item['link']):
+                        extracted += 1
+            elapsed += time.perf_counter() - started
+            # Not part of the timing; process_news closes its own processor
+            news_processor.close()
+        result = summarize(len(news_items) * self.args.repeat, elapsed, latencies)
+        result['extracted'] = extracted
+        return result
+
+    def bench_process(self, news_items):
+        latencies = []
+        elapsed = 0.0
+        processed_news = []
+        for _ in range(self.args.repeat):
+            news_processor = NewsProcessor(use_cache=False)
+            news_processor.prepare_item = timed(news_processor.prepare_item, latencies)
+            started = time.perf_counter()
+            with self.quiet():
+                processed_news = news_processor.process_news(news_items)
+            elapsed += time.perf_counter() - started
+        return processed_news, summarize(len(news_items) * self.args.repeat, elapsed, latencies)
+
+    def reset_site(self):
+        """Remove everything generate_site writes, so each run starts cold."""
+        for path in [os.path.join('public', 'data'), os.path.join('public', 'archive'), config.JINJA_CACHE_DIR]:
+            shutil.rmtree(path, ignore_errors=True)
+        for path in [config.BUILD_MANIFEST_FILE, self.history_path,
+                     os.path.join('public', 'index.html'), os.path.join('public', 'archive.html'),
+                     os.path.join('public', 'search.html')]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def seed_archive(self, history, processed_news):
+        """Fill earlier months of the archive with copies of the processed items."""
+        web_gen = WebGenerator(history)
+        manifest = web_gen.load_manifest()
+        by_month = {}
+        now = datetime.now()
+        for i in range(self.args.archive_items):
+            item = dict(processed_news[i % len(processed_news)])
+            published = now - timedelta(days=1, hours=6 * i)
+            item['link'] = f"{item['link']}#archived-{i}"
+            item['published'] = published.strftime('%Y-%m-%d %H:%M:%S')
+            item['fetched_at'] = published.isoformat()
+            by_month.setdefault(published.strftime('%Y-%m'), []).append(item)
+        for month, articles in by_month.items():
+            articles.reverse()  # Oldest first within a shard
+            web_gen.save_shard(month, articles, manifest)
+            history.mark_archived(item['link'] for item in articles)
+        web_gen.save_manifest(manifest)
+
+    def bench_site(self, processed_news):
+        cold, warm = [], []
+        for _ in range(self.args.repeat):
+            self.reset_site()
+            history = HistoryStore(self.history_path)
+            with self.quiet():
+                if processed_news and self.args.archive_items:
+                    self.seed_archive(history, processed_news)
+                started = time.perf_counter()
+                WebGenerator(history).generate_site([dict(item) for item in processed_news])
+                cold.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                WebGenerator(history).generate_site([])
+                warm.append(time.perf_counter() - started)
+        articles = len(processed_news) + self.args.archive_items
+        return (summarize(articles * self.args.repeat, sum(cold), cold),
+                summarize(articles * self.args.repeat, sum(warm), warm))
+
+    def bench_report(self, processed_news):
+        latencies = []
+        reporter = PDFReporter()
+        generate_report = timed(reporter.generate_report, latencies)
+        for _ in range(self.args.repeat):
+            with self.quiet():
+                generate_report(processed_news)
+        return summarize(len(processed_news) * self.args.repeat, sum(latencies), latencies)
+
+    def run(self, stages):
+        news_items, fetch_result = self.bench_fetch()
+        if 'fetch' in stages:
+            self.results['fetch'] = fetch_result
+        if not news_items:
+            raise RuntimeError("The fixtures produced no news items; check the fixture dates and filters.")
+        if 'scrape' in stages:
+            self.results['scrape'] = self.bench_scrape(news_items)
+        processed_news, process_result = self.bench_process(news_items)
+        if 'process' in stages:
+            self.results['process'] = process_result
+        if 'site' in stages or 'site_warm' in stages:
+            cold, warm = self.bench_site(processed_news)
+            if 'site' in stages:
+                self.results['site'] = cold
+            if 'site_warm' in stages:
+                self.results['site_warm'] = warm
+        if 'report' in stages:
+            self.results['report'] = self.bench_report(processed_news)
+        return self.results
+
+
+def settings_of(args):
+    """Settings that must match for two runs to be comparable."""
+    return {
+        'repeat': args.repeat,
+        'translator_latency_ms': args.translator_latency,
+        'decode_latency_ms': args.decode_latency,
+        'feed_latency_ms': args.feed_latency,
+        'page_latency_ms': args.page_latency,
+        'archive_items': args.archive_items,
+        **({'extract_workers': args.extract_workers} if args.extract_workers is not None else {}),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return {stage: (throughput change, p50 change, regressed)} against the baseline."""
+    comparison = {}
+    for stage, result in results.items():
+        reference = baseline.get('stages', {}).get(stage)
+        if not reference:
+            continue
+        speed = result['items_per_sec'] / reference['items_per_sec'] - 1 if reference['items_per_sec'] else 0.0
+        latency = result['p50_ms'] / reference['p50_ms'] - 1 if reference['p50_ms'] else 0.0
+        comparison[stage] = (speed, latency, speed < -tolerance or latency > tolerance)
+    return comparison
+
+
+def print_report(results, comparison, metrics=None):
+    header = f"{'stage':<28}{'items':>7}{'items/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}  vs baseline"
+    print(header)
+    print('-' * len(header))
+    for stage in STAGES:
+        if stage not in results:
+            continue
+        result = results[stage]
+        line = (f"{STAGE_LABELS[stage]:<28}{result['items']:>7}{result['items_per_sec']:>10.1f}"
+                f"{result['p50_ms']:>10.1f}{result['p90_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+        if stage in comparison:
+            speed, latency, regressed = comparison[stage]
+            line += f"  {speed:+.0%} items/s, {latency:+.0%} p50" + ("  REGRESSION" if regressed else "")
+        print(line)
+    if 'scrape' in results:
+        print(f"\nArticles extracted: {results['scrape']['extracted']}/{results['scrape']['items']}")
+    if metrics and metrics['counters']:
+        print_extractor_rates(metrics['counters'])
+        print("Counters: " + ", ".join(f"{name}={count}" for name, count in metrics['counters'].items()))
+
+
+def print_extractor_rates(counters):
+    """Hit rate of every site extractor (pages it could read / pages of its outlet).
+
+    The fixture pages are synthetic, so this shows that each extractor ran,
+    not how well it reads the real sites.
+    """
+    rates = []
+    unused = []
+    for extractor in EXTRACTORS.extractors:
+        hits = counters.get(f'extractor_{extractor.name}_hits', 0)
+        misses = counters.get(f'extractor_{extractor.name}_misses', 0)
+        if hits or misses:
+            rates.append(f"{extractor.name} {hits}/{hits + misses} ({hits / (hits + misses):.0%})")
+        else:
+            unused.append(extractor.name)
+    if rates:
+        print("Site extractors: " + ", ".join(rates))
+    if unused and rates:
+        print(f"Warning: no fixture page reached the {', '.join(unused)} extractor(s)")
+
+
+def prepare_workdir(path):
+    for name in WORKDIR_FILES:
+        source = os.path.join(REPO_ROOT, name)
+        target = os.path.join(path, name)
+        os.makedirs(os.path.dirname(target) or path, exist_ok=True)
+        if os.path.isdir(source):
+            shutil.copytree(source, target)
+        else:
+            shutil.copy(source, target)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the news pipeline stages.")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma separated subset of {', '.join(STAGES)}")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage (default 3)")
+    parser.add_argument('--translator-latency', type=float, default=100, help="Stub translator delay per request in ms")
+    parser.add_argument('--decode-latency', type=float, default=20, help="Stub Google News decoder delay in ms")
+    parser.add_argument('--feed-latency', type=float, default=30, help="Fixture server delay per feed in ms")
+    parser.add_argument('--page-latency', type=float, default=50, help="Fixture server delay per article page in ms")
+    parser.add_argument('--archive-items', type=int, default=2000, help="Older articles seeded into the archive for generate_site")
+    parser.add_argument('--extract-workers', type=int, help="Extraction processes (default: config.EXTRACT_WORKERS)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline file to compare with or save to")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before a stage counts as a regression")
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    parser.add_argument('--keep-workdir', action='store_true', help="Do not delete the temporary working directory")
+    parser.add_argument('--verbose', action='store_true', help="Show the pipeline's own output")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"Unknown stages: {', '.join(unknown)}")
+        return 2
+
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix='news-bench-')
+    prepare_workdir(workdir)
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+
+    server = FixtureServer(feed_latency=args.feed_latency / 1000.0, page_latency=args.page_latency / 1000.0)
+    server.start(config.SEARCH_KEYWORDS)
+    # Publisher pages go through the fixture server acting as a proxy, feeds directly
+    os.environ['HTTP_PROXY'] = os.environ['http_proxy'] = server.proxy_url
+    os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1,localhost'
+    fetcher.GOOGLE_NEWS_RSS_URL = server.rss_url
+    processor.new_decoderv1 = StubDecoder(server, latency=args.decode_latency / 1000.0)
+    StubTranslator.latency = args.translator_latency / 1000.0
+    processor.GoogleTranslator = StubTranslator
+    if args.extract_workers is not None:
+        processor.EXTRACT_WORKERS = args.extract_workers
+
+    print(f"Benchmarking {', '.join(stages)} ({args.repeat} runs each) in {workdir}")
+    METRICS.reset()
+    try:
+        results = BenchmarkRunner(args).run(stages)
+    finally:
+        server.stop()
+        os.chdir(previous_dir)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    run = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'settings': settings_of(args),
+        'stages': results,
+        'metrics': METRICS.snapshot(),
+    }
+
+    baseline = None
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != run['settings']:
+            print(f"Warning: baseline was recorded with different settings: {baseline.get('settings')}")
+
+    comparison = compare(results, baseline, args.tolerance) if baseline else {}
+    print()
+    print_report(results, comparison, run['metrics'])
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+    elif baseline is None:
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to record one.")
+    elif any(regressed for _, _, regressed in comparison.values()):
+        print(f"\nSome stages are more than {args.tolerance:.0%} slower than the baseline.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
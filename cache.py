@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+from config import FEED_CACHE_FILE, DECODE_CACHE_FILE, DECODE_CACHE_TTL_DAYS, DECODE_CACHE_NEGATIVE_TTL_MINUTES
+from config import TRANSLATION_CACHE_FILE, TRANSLATION_CACHE_MEMORY_ITEMS, TRANSLATION_CACHE_MAX_ENTRIES
+
+
+class FeedCache:
+    """Persistent cache of Google News RSS responses, keyed by query URL.
+
+    Each record keeps the validators (ETag / Last-Modified) sent by the server
+    and the already parsed entries, so a 304 response can be answered without
+    downloading or parsing the feed again.
+    """
+
+    def __init__(self, path=FEED_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = self._load()
+        self.dirty = False
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except:
+                return {}
+        return {}
+
+    def get(self, url):
+        """Return the cached record for a URL, or None."""
+        with self.lock:
+            return self.records.get(url)
+
+    def conditional_headers(self, url):
+        """Build If-None-Match / If-Modified-Since headers for a cached URL."""
+        record = self.get(url)
+        headers = {}
+        if record:
+            if record.get('etag'):
+                headers['If-None-Match'] = record['etag']
+            if record.get('modified'):
+                headers['If-Modified-Since'] = record['modified']
+        return headers
+
+    def put(self, url, etag, modified, entries):
+        """Store the entries of a freshly downloaded feed."""
+        with self.lock:
+            if not etag and not modified:
+                # Without validators we can never get a 304, so don't keep it
+                if self.records.pop(url, None) is not None:
+                    self.dirty = True
+                return
+            self.records[url] = {
+                'etag': etag,
+                'modified': modified,
+                'entries': entries
+            }
+            self.dirty = True
+
+    def save(self):
+        """Write the cache to disk if anything changed."""
+        with self.lock:
+            if not self.dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.records, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except Exception as e:
+                print(f"Error saving feed cache: {e}")
+
+
+def google_article_id(url):
+    """Extract the article ID from a news.google.com/rss/articles/<id> link."""
+    parts = [p for p in urlparse(url).path.split('/') if p]
+    if 'articles' in parts:
+        index = parts.index('articles')
+        if index + 1 < len(parts):
+            return parts[index + 1]
+    return url
+
+
+class DecodeCache:
+    """SQLite cache mapping Google News article IDs to decoded publisher URLs.
+
+    Successful lookups live for DECODE_CACHE_TTL_DAYS, failures are remembered
+    for DECODE_CACHE_NEGATIVE_TTL_MINUTES so a broken link isn't retried by
+    every keyword query in the same run.
+    """
+
+    def __init__(self, path=DECODE_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS decoded ("
+            "article_id TEXT PRIMARY KEY, "
+            "decoded_url TEXT, "
+            "expires_at REAL NOT NULL)"
+        )
+        self.evict_expired()
+
+    def evict_expired(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM decoded WHERE expires_at < ?", (time.time(),))
+            self.conn.commit()
+
+    def get(self, article_id):
+        """Return (hit, decoded_url). decoded_url is None for a cached failure."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT decoded_url, expires_at FROM decoded WHERE article_id = ?", (article_id,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return False, None
+        return True, row[0]
+
+    def put(self, article_id, decoded_url):
+        """Store a decoded URL, or a failure if decoded_url is None."""
+        if decoded_url:
+            ttl = DECODE_CACHE_TTL_DAYS * 86400
+        else:
+            ttl = DECODE_CACHE_NEGATIVE_TTL_MINUTES * 60
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO decoded (article_id, decoded_url, expires_at) VALUES (?, ?, ?)",
+                (article_id, decoded_url, time.time() + ttl)
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class TranslationCache:
+    """Content-addressed translation cache: in-memory LRU in front of SQLite.
+
+    Keys are a SHA-256 of (source language, target language, text), so
+    syndicated texts (e.g. the same APA report on several outlets) share an
+    entry. The persistent store is trimmed to TRANSLATION_CACHE_MAX_ENTRIES,
+    dropping the least recently used translations first.
+    """
+
+    def __init__(self, path=TRANSLATION_CACHE_FILE, memory_items=TRANSLATION_CACHE_MEMORY_ITEMS,
+                 max_entries=TRANSLATION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.touched = set()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, "
+            "translated TEXT NOT NULL, "
+            "last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+
+    @staticmethod
+    def make_key(text, source, target):
+        return hashlib.sha256(f"{source}\x00{target}\x00{text}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key, translated):
+        self.memory[key] = translated
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def get(self, text, source, target):
+        """Return the cached translation, or None."""
+        key = self.make_key(text, source, target)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                self.touched.add(key)
+                return self.memory[key]
+            row = self.conn.execute("SELECT translated FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.touched.add(key)
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, text, source, target, translated):
+        key = self.make_key(text, source, target)
+        with self.lock:
+            self._remember(key, translated)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations (key, translated, last_used) VALUES (?, ?, ?)",
+                (key, translated, time.time())
+            )
+            self.conn.commit()
+
+    def flush(self):
+        """Persist recency of cache hits and trim the store to its size limit."""
+        with self.lock:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE translations SET last_used = ? WHERE key = ?",
+                [(now, key) for key in self.touched]
+            )
+            self.touched.clear()
+            count = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM translations WHERE key IN "
+                    "(SELECT key FROM translations ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'misses': self.misses,
+                'entries_in_memory': len(self.memory)
+            }
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,81 @@
+import os
+import json
+import threading
+from config import CHECKPOINT_FILE
+
+
+class CheckpointJournal:
+    """Append-only journal of processed items, so an interrupted run can resume.
+
+    Each item is written as one JSON line and fsynced as soon as it has been
+    scraped and translated. A restarted run takes the items found here instead
+    of processing them again. The journal is cleared once a run has finished
+    processing and its links are in the history. A line cut off by a crash is
+    ignored. With path=None nothing is read or written.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.torn = False  # the last line was cut off, start the next one on a new line
+        self.items = self._load() if path else {}
+
+    def _load(self):
+        items = {}
+        if not os.path.exists(self.path):
+            return items
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self.torn = not line.endswith('\n')
+                    try:
+                        item = json.loads(line)
+                        items[item['link']] = item
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except Exception as e:
+            print(f"Error reading checkpoint journal: {e}")
+        return items
+
+    def get(self, link):
+        """The processed item journaled for a link, or None."""
+        with self.lock:
+            return self.items.get(link)
+
+    def record(self, item):
+        """Append a processed item and flush it to disk."""
+        with self.lock:
+            self.items[item['link']] = item
+            if not self.path:
+                return
+            try:
+                if self.file is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    self.file = open(self.path, 'a', encoding='utf-8')
+                    if self.torn:
+                        self.file.write('\n')
+                        self.torn = False
+                self.file.write(json.dumps(item, ensure_ascii=False) + '\n')
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except Exception as e:
+                print(f"Error writing checkpoint journal: {e}")
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def clear(self):
+        """Drop the journal after a completed run."""
+        self.close()
+        with self.lock:
+            self.items = {}
+            self.torn = False
+            if self.path and os.path.exists(self.path):
+                try:
+                    os.remove(self.path)
+                except Exception as e:
+                    print(f"Error removing checkpoint journal: {e}")
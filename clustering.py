@@ -0,0 +1,232 @@
+import re
+import html
+import random
+import hashlib
+from config import CLUSTER_SIMILARITY, CLUSTER_NUM_PERM, CLUSTER_BANDS
+from config import CLUSTER_SHORT_TOKENS, CLUSTER_SHORT_MAX_DIFF, CLUSTER_MIN_SHARED
+from metrics import METRICS
+
+TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'\w+')
+UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+SUFFIXES = ('ern', 'em', 'en', 'er', 'es', 'e', 'n', 's')
+STOPWORDS = {
+    'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einer', 'einem', 'einen', 'eines',
+    'und', 'oder', 'aber', 'mit', 'von', 'vom', 'zum', 'zur', 'bei', 'beim', 'auf', 'aus', 'nach',
+    'fuer', 'ueber', 'unter', 'vor', 'hinter', 'wegen', 'ist', 'sind', 'war', 'wurde', 'wurden',
+    'hat', 'haben', 'nicht', 'sich', 'auch', 'noch', 'nur', 'wie', 'was', 'wer', 'als', 'dass',
+    'im', 'in', 'am', 'an', 'zu', 'es', 'er', 'sie', 'so', 'um'
+}
+
+# Places, roads and numbers tell apart incidents of the same kind ("Brand in
+# Graz" / "Brand in Linz", "Unfall auf der A1" / "A2"), so reports in one
+# cluster must not disagree on them. Umlaut-folded word -> place.
+PLACES = {word: place for place, words in {
+    'wien': ['wien', 'wiener'], 'niederoesterreich': ['niederoesterreich', 'noe'],
+    'oberoesterreich': ['oberoesterreich', 'ooe'], 'steiermark': ['steiermark', 'steirisch', 'steirischen'],
+    'kaernten': ['kaernten', 'kaerntner'], 'tirol': ['tirol', 'tiroler'], 'salzburg': ['salzburg', 'salzburger'],
+    'vorarlberg': ['vorarlberg', 'vorarlberger'], 'burgenland': ['burgenland', 'burgenlaendisch', 'burgenlaendischen'],
+    'graz': ['graz', 'grazer'], 'linz': ['linz', 'linzer'], 'innsbruck': ['innsbruck', 'innsbrucker'],
+    'klagenfurt': ['klagenfurt', 'klagenfurter'], 'villach': ['villach', 'villacher'],
+    'st_poelten': ['poelten'], 'wiener_neustadt': ['neustadt'], 'wels': ['wels'], 'steyr': ['steyr'],
+    'dornbirn': ['dornbirn'], 'bregenz': ['bregenz'], 'feldkirch': ['feldkirch'], 'bludenz': ['bludenz'],
+    'leoben': ['leoben'], 'kapfenberg': ['kapfenberg'], 'krems': ['krems'], 'baden': ['baden'],
+    'moedling': ['moedling'], 'amstetten': ['amstetten'], 'tulln': ['tulln'], 'zwettl': ['zwettl'],
+    'eisenstadt': ['eisenstadt'], 'oberwart': ['oberwart'], 'gmunden': ['gmunden'], 'braunau': ['braunau'],
+    'voecklabruck': ['voecklabruck'], 'ried': ['ried'], 'hallein': ['hallein'], 'bischofshofen': ['bischofshofen'],
+    'kufstein': ['kufstein'], 'schwaz': ['schwaz'], 'kitzbuehel': ['kitzbuehel'], 'imst': ['imst'],
+    'landeck': ['landeck'], 'reutte': ['reutte'], 'lienz': ['lienz'], 'spittal': ['spittal'],
+    'wolfsberg': ['wolfsberg'], 'ischgl': ['ischgl'], 'soelden': ['soelden'],
+}.items() for word in words}
+NUMBER_WORDS = {'zwei', 'drei', 'vier', 'fuenf', 'sechs', 'sieben', 'acht', 'neun', 'zehn', 'elf', 'zwoelf',
+                'zwanzig', 'dutzend', 'hundert', 'hunderte', 'tausend'}
+ROAD_RE = re.compile(r'^[a-z]{1,2}\d+$')  # A1, B17, S6
+
+# Fixed permutations, so signatures are comparable between runs
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240129)
+PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(CLUSTER_NUM_PERM)]
+
+
+def _words(item):
+    """Content words of the German title and RSS summary, lowercased and umlaut-folded."""
+    title = item.get('title') or ''
+    source = item.get('source') or ''
+    if source and title.endswith(f" - {source}"):
+        title = title[:-len(f" - {source}")]
+    summary = html.unescape(TAG_RE.sub(' ', item.get('summary') or ''))
+    if source:
+        summary = summary.replace(source, ' ')
+
+    for word in WORD_RE.findall(f"{title} {summary}".lower().translate(UMLAUTS)):
+        # Short words are noise, unless they carry a number (A1, B17, ...)
+        if word in STOPWORDS or (len(word) < 3 and not any(c.isdigit() for c in word)):
+            continue
+        yield word
+
+
+def normalize_tokens(item):
+    """Content words of the German title and RSS summary, crudely stemmed."""
+    tokens = set()
+    for word in _words(item):
+        if len(word) > 5:
+            for suffix in SUFFIXES:
+                if word.endswith(suffix):
+                    word = word[:-len(suffix)]
+                    break
+        tokens.add(word)
+    return tokens
+
+
+def incident_keys(item):
+    """Places, roads and numbers mentioned in the title and RSS summary, by kind."""
+    keys = {'place': set(), 'road': set(), 'number': set()}
+    for word in _words(item):
+        if word in PLACES:
+            keys['place'].add(PLACES[word])
+        elif ROAD_RE.match(word):
+            keys['road'].add(word)
+        elif word.isdigit() or word in NUMBER_WORDS:
+            keys['number'].add(word)
+    return keys
+
+
+def keys_conflict(keys_a, keys_b):
+    """True if both reports name places (or roads, or numbers) and they differ."""
+    return any(keys_a[kind] and keys_b[kind] and keys_a[kind] != keys_b[kind] for kind in keys_a)
+
+
+def minhash(tokens):
+    """MinHash signature of a token set (CLUSTER_NUM_PERM values)."""
+    if not tokens:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'big') for t in tokens]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+class IncidentClusterer:
+    """Group near-duplicate reports of the same incident.
+
+    Items are compared with MinHash over their normalized German title and RSS
+    summary; LSH banding keeps the candidate lookup O(1) per item. Candidates
+    are then checked exactly: they must not name different places, roads or
+    numbers, must share at least CLUSTER_MIN_SHARED words, and reach the
+    Jaccard threshold. Short reports (RSS summaries are often just the title,
+    a few words) may instead differ by at most CLUSTER_SHORT_MAX_DIFF words,
+    so "Einbruch in Wohnung" and "Einbruch in Geschäft" stay apart. The first
+    item of a cluster is its representative and the only one passed on for
+    scraping and translation; later members are recorded in `related` under
+    the representative's link.
+    """
+
+    def __init__(self, threshold=CLUSTER_SIMILARITY, bands=CLUSTER_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = CLUSTER_NUM_PERM // bands
+        self.buckets = {}    # (band, band values) -> [representative index]
+        self.tokens = []      # representative index -> normalized words
+        self.keys = []        # representative index -> incident_keys()
+        self.items = []       # representative index -> item
+        self.related = {}     # representative link -> [{'source', 'link', 'title'}]
+        self.seen_count = 0
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+
+    def _score(self, tokens, keys, index):
+        """Jaccard similarity with a representative, or None if they can't be the same incident."""
+        other = self.tokens[index]
+        shared = len(tokens & other)
+        if shared < CLUSTER_MIN_SHARED or keys_conflict(keys, self.keys[index]):
+            return None
+        score = shared / len(tokens | other)
+        if min(len(tokens), len(other)) < CLUSTER_SHORT_TOKENS:
+            return score if len(tokens ^ other) <= CLUSTER_SHORT_MAX_DIFF else None
+        return score if score >= self.threshold else None
+
+    def find(self, signature, tokens, keys):
+        """Index of the best matching representative, or None."""
+        best, best_score = None, 0
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        for index in candidates:
+            score = self._score(tokens, keys, index)
+            if score is not None and score > best_score:
+                best, best_score = index, score
+        return best
+
+    def add(self, item):
+        """Cluster one item. Returns True if it is a new representative."""
+        self.seen_count += 1
+        tokens = normalize_tokens(item)
+        signature = minhash(tokens)
+        if signature is None:
+            return True
+
+        keys = incident_keys(item)
+        index = self.find(signature, tokens, keys)
+        if index is not None:
+            representative = self.items[index]
+            self.related.setdefault(representative['link'], []).append({
+                'source': item['source'],
+                'link': item['link'],
+                'title': item['title']
+            })
+            return False
+
+        index = len(self.items)
+        self.items.append(item)
+        self.tokens.append(tokens)
+        self.keys.append(keys)
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(index)
+        return True
+
+    def iter_representatives(self, news_items):
+        """Pass through only the first item of every cluster."""
+        for item in news_items:
+            if self.add(item):
+                yield item
+        duplicates = sum(len(links) for links in self.related.values())
+        METRICS.incr('clustered_duplicates', duplicates)
+        print(f"Clustering: {self.seen_count} items, {duplicates} near-duplicates attached to {len(self.related)} incidents.")
+
+    def attach_related(self, processed_news):
+        """Add the other sources of each incident to its processed representative."""
+        for item in processed_news:
+            related = self.related.get(item['link'])
+            if related:
+                item['related'] = related
+        return processed_news
+
+
+if __name__ == "__main__":
+    # Check with Google News style items (the RSS summary is just title + source)
+    def rss_item(title, source, n):
+        return {
+            'title': f"{title} - {source}",
+            'link': f"http://example.com/{n}",
+            'source': source,
+            'summary': f'<a href="http://example.com/{n}">{title}</a>&nbsp;&nbsp;<font color="#6f6f6f">{source}</font>'
+        }
+
+    separate = [
+        ("Brand in Wohnhaus in Graz", "Brand in Wohnhaus in Linz"),
+        ("Lawinenabgang in Tirol: Ein Toter", "Lawinenabgang in Salzburg: Ein Toter"),
+        ("Unfall auf der A1: Zwei Verletzte", "Unfall auf der A2: Zwei Verletzte"),
+        ("Unwetter Meldung 11 in Wien", "ÖBB Meldung 11 in Wien"),
+        ("Einbruch in Wohnung in Graz: Polizei sucht Zeugen", "Einbruch in Geschäft in Graz: Polizei sucht Zeugen"),
+    ]
+    same = [
+        ("Lawinenabgang in Tirol: Ein Toter", "Lawinenabgang in Tirol: Ein Toter"),
+        ("Schwerer Unfall auf der A1 bei Linz: Zwei Verletzte", "Schwerer Unfall auf A1 bei Linz - zwei Verletzte"),
+        ("Einbruch in Wohnung in Graz: Polizei sucht Zeugen", "Einbruch in Wohnung in Graz: Polizei sucht dringend Zeugen"),
+    ]
+    for expected, pairs in ((True, separate), (False, same)):
+        for first, second in pairs:
+            clusterer = IncidentClusterer()
+            clusterer.add(rss_item(first, "ORF", 1))
+            kept_apart = clusterer.add(rss_item(second, "Kronen Zeitung", 2))
+            print(f"{'ok  ' if kept_apart == expected else 'FAIL'} {'separate' if kept_apart else 'merged  '}: {first} / {second}")
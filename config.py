@@ -54,6 +54,71 @@ ALLOWED_SOURCES = [
     "Stadt Wien", "APA-OTS", "APA", "ÖAMTC", "ARBÖ", "Asfinag"
 ]
 
+# Concurrent feed fetching
+# Number of keyword feeds downloaded in parallel (1 = sequential, as before)
+FETCH_WORKERS = 8
+
+# Feed cache (conditional GET)
+# Google News RSS responses are cached per query URL together with their
+# ETag / Last-Modified headers, so an unchanged feed costs a single 304.
+CACHE_DIR = ".cache"
+FEED_CACHE_FILE = ".cache/feed_cache.json"
+FEED_TIMEOUT = 15  # seconds per RSS request
+FAST_RSS_PARSER = True  # lxml streaming parser for Google News RSS (feedparser stays the fallback)
+
+# Google News link decoding cache (article ID -> publisher URL)
+DECODE_CACHE_FILE = ".cache/decode_cache.sqlite3"
+DECODE_CACHE_TTL_DAYS = 90           # Decoded URLs never change, keep them long
+DECODE_CACHE_NEGATIVE_TTL_MINUTES = 60  # Retry failed lookups after this
+
+# Translation cache (hash of text + languages -> translation)
+TRANSLATION_CACHE_FILE = ".cache/translation_cache.sqlite3"
+TRANSLATION_CACHE_MEMORY_ITEMS = 2000   # In-memory LRU layer
+TRANSLATION_CACHE_MAX_ENTRIES = 50000   # Persistent store, least recently used evicted first
+
+# Batched translation
+# Titles and summaries are packed into one request up to this many characters
+# (GoogleTranslator rejects anything above 5000).
+TRANSLATION_BATCH_CHARS = 4500
+TRANSLATION_BATCH_WORKERS = 4  # Batches sent at the same time
+
+# Parallel article processing
+PROCESS_WORKERS = 8        # Items scraped/translated at the same time (1 = sequential)
+PER_HOST_CONCURRENCY = 2   # Max simultaneous requests to a single host (orf.at, krone.at, ...)
+DECODE_CONCURRENCY = 4     # Max simultaneous Google News link decodes (all go to news.google.com)
+ARTICLE_TIMEOUT = 10       # seconds per article download
+ARTICLE_MAX_BYTES = 1500000 # Article pages are cut off after this many bytes
+EXTRACT_WORKERS = None      # Processes for HTML extraction (None = one per CPU core; 0 or 1 = in the scraping threads)
+
+# Per-domain health of article downloads (adaptive timeouts, circuit breaker, retries)
+HEALTH_FILE = ".cache/domain_health.json"
+HEALTH_EWMA_ALPHA = 0.3           # Weight of the newest result in the moving averages
+HEALTH_TIMEOUT_FACTOR = 4         # Timeout = latency EWMA x factor, within the bounds below
+HEALTH_MIN_TIMEOUT = 3            # seconds (ARTICLE_TIMEOUT is the upper bound)
+HEALTH_BREAKER_FAILURES = 3       # Consecutive failed articles that open a domain's circuit
+HEALTH_CONSENT_THRESHOLD = 0.8    # Consent-wall rate that opens the circuit...
+HEALTH_MIN_SAMPLES = 5            # ...once the domain has this many results
+HEALTH_COOLDOWN_MINUTES = 60      # An open circuit lets one trial request through after this
+HEALTH_FORGET_DAYS = 30           # Domains not seen for this long are dropped
+SCRAPE_RETRIES = 2                # Extra attempts on timeouts, connection errors, 429 and 5xx
+SCRAPE_BACKOFF = 0.5              # seconds before the first retry, doubled each time (with jitter)
+
+# Checkpoint journal: processed items are appended as they complete, so an
+# interrupted run resumes without scraping/translating them again
+CHECKPOINT_FILE = ".cache/checkpoint.jsonl"
+
+# Streaming pipeline (fetch -> scrape -> translate)
+PIPELINE_BUFFER = 50          # Max items waiting between two stages
+TRANSLATION_CHUNK_ITEMS = 20  # Scraped items collected before a translation batch is sent
+
+# Near-duplicate incident clustering (before scraping/translation)
+CLUSTER_SIMILARITY = 0.5  # Jaccard similarity of title+summary words
+CLUSTER_SHORT_TOKENS = 8  # Reports with fewer words (the RSS summary is often just the title)...
+CLUSTER_SHORT_MAX_DIFF = 1   # ...may differ by at most this many words (one added word, not a replaced one)
+CLUSTER_MIN_SHARED = 3    # Words two reports must have in common
+CLUSTER_NUM_PERM = 64     # MinHash signature length
+CLUSTER_BANDS = 16        # LSH bands (CLUSTER_NUM_PERM / CLUSTER_BANDS rows each)
+
 # Date filtering
 DAYS_LOOKBACK = 1  # Fetch news from the last N days (kept for fetcher optimization, but strict 24h check applied later)
 
@@ -63,5 +128,28 @@ OUTPUT_DIR = "reports"
 FILENAME_FORMAT = "{date} Safety Report" 
 DATE_FORMAT = "%Y%m%d"
 
+# Static search index (public/data/search)
+SEARCH_INDEX_SHARDS = 64   # Bigram posting lists are split into this many files
+SEARCH_DOC_BLOCK = 200     # Articles per document block
+
+# Archive pages (public/archive/N.html)
+ARCHIVE_PAGE_SIZE = 50
+
+# Incremental site build
+BUILD_MANIFEST_FILE = ".cache/build_manifest.json"  # Input hash of every rendered page
+JINJA_CACHE_DIR = ".cache/jinja"                     # Compiled template bytecode
+
+# Publish step (minify + precompress public/)
+PUBLISH_COMPRESS_MIN_BYTES = 131072  # Only large artifacts (archive shards, search doc blocks) get a .gz/.br
+PUBLISH_BROTLI_QUALITY = 9           # 11 is several times slower for a few percent smaller files
+PUBLISH_REPORT_TOP = 15              # Files listed in the size report
+
 # History file for deduplication
-HISTORY_FILE = "news_history.json"
+HISTORY_FILE = "news_history.json"  # Legacy link list, imported once into HISTORY_LOG and removed
+HISTORY_LOG = "news_history.log"    # Append-only "<timestamp>\t<S|A>\t<link>" lines, committed by the workflow
+HISTORY_TTL_DAYS = 60          # Links older than this are pruned (feeds only look back 24h)
+HISTORY_MAX_ENTRIES = 100000
+
+# Run metrics (stage timings, counters, per-host latency histograms)
+METRICS_FILE = ".cache/metrics.json"
+METRICS_PROMETHEUS_FILE = ""  # e.g. node_exporter's textfile dir + "/news_reporter.prom"; empty = off
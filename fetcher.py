@@ -2,113 +2,205 @@ import feedparser
 import requests
 from datetime import datetime, timedelta
 import time
-from config import GOOGLE_NEWS_RSS_URL, SEARCH_KEYWORDS, DAYS_LOOKBACK, EXCLUDED_KEYWORDS, ALLOWED_SOURCES
-from urllib.parse import quote, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from config import GOOGLE_NEWS_RSS_URL, SEARCH_KEYWORDS, DAYS_LOOKBACK, EXCLUDED_KEYWORDS, ALLOWED_SOURCES, FETCH_WORKERS, FEED_TIMEOUT, FAST_RSS_PARSER
+from urllib.parse import quote
+from cache import FeedCache
+from matcher import KeywordMatcher, SourceMatcher
+from metrics import METRICS
+from rss_parser import parse_google_news
+
+# Compiled once at startup, shared by every fetcher instance
+SOURCE_MATCHER = SourceMatcher(ALLOWED_SOURCES)
+EXCLUDED_MATCHER = KeywordMatcher(EXCLUDED_KEYWORDS)
 
 class NewsFetcher:
-    def __init__(self):
+    def __init__(self, use_cache=True, now=None):
         self.seen_links = set()
+        # Fixed "current time" for the 24h window (replaying a recording); None = clock
+        self.now = now
+        self.feed_cache = FeedCache() if use_cache else None
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        })
 
     def is_allowed_source(self, source_name, link):
         """Check if the source is in the whitelist or if the domain matches a whitelist source."""
-        if not source_name:
-            return False
-            
-        # Check exact or partial match in source name
-        for allowed in ALLOWED_SOURCES:
-            if allowed.lower() in source_name.lower():
-                return True
-        
-        # Fallback: Check domain if source name is generic or missing, 
-        # but for now let's stick to the source name provided by Google News 
-        # as it's usually reliable for major outlets.
-        # We can also check if the allowed source name appears in the domain.
-        try:
-            domain = urlparse(link).netloc.lower()
-            for allowed in ALLOWED_SOURCES:
-                # Remove spaces for domain check (e.g. "Die Presse" -> "diepresse")
-                clean_allowed = allowed.lower().replace(" ", "").replace("ä", "ae").replace("ö", "oe").replace("ü", "ue")
-                if clean_allowed in domain:
-                    return True
-        except:
-            pass
-            
-        return False
+        # Source name first (Google News names are reliable for major outlets),
+        # then the allowed source name inside the domain (e.g. "Die Presse" -> "diepresse")
+        return SOURCE_MATCHER.is_allowed(source_name, link)
 
     def contains_excluded_keyword(self, text):
         """Check if text contains any excluded keywords"""
-        if not text:
-            return False
-        for keyword in EXCLUDED_KEYWORDS:
-            if keyword.lower() in text.lower():
-                return True
-        return False
-
-    def fetch_news(self):
-        all_news = []
-        cutoff_date = datetime.now() - timedelta(days=DAYS_LOOKBACK)
+        return EXCLUDED_MATCHER.search(text) is not None
+
+    def _entry_to_dict(self, entry):
+        """Keep only the fields we use from a feedparser entry (JSON serializable for the cache)."""
+        published_parsed = entry.get('published_parsed')
+        return {
+            'title': entry.title,
+            'link': entry.link,
+            'published_parsed': list(published_parsed) if published_parsed else None,
+            'source': entry.source.title if hasattr(entry, 'source') else 'Unknown',
+            'summary': entry.summary if hasattr(entry, 'summary') else ''
+        }
+
+    def _fetch_feed(self, keyword, now=None):
+        """Download and parse the Google News RSS feed for a single keyword.
+
+        Uses a conditional GET against the feed cache; on 304 the cached entries
+        are returned without parsing anything. The fast parser already drops
+        entries that are older than 24h (relative to now) or from sources
+        outside the whitelist; feedparser is the fallback.
+        """
+        encoded_query = quote(keyword)
+        rss_url = GOOGLE_NEWS_RSS_URL.format(query=encoded_query)
+
+        headers = self.feed_cache.conditional_headers(rss_url) if self.feed_cache else {}
+        with METRICS.timer('fetch'):
+            started = time.perf_counter()
+            response = self.session.get(rss_url, headers=headers, timeout=FEED_TIMEOUT)
+            METRICS.observe_host(rss_url, time.perf_counter() - started)
+
+            if response.status_code == 304 and self.feed_cache:
+                record = self.feed_cache.get(rss_url)
+                if record is not None:
+                    METRICS.incr('feed_cache_hits')
+                    return record['entries']
+                # Cache was cleared under us, ask again without validators
+                response = self.session.get(rss_url, timeout=FEED_TIMEOUT)
+
+            response.raise_for_status()
+
+        entries = None
+        if FAST_RSS_PARSER:
+            try:
+                with METRICS.timer('parse_feed'):
+                    entries = parse_google_news(response.content, now=now, is_allowed=self.is_allowed_source)
+            except Exception as e:
+                print(f"Fast RSS parser failed for {keyword} ({e}), using feedparser")
+                METRICS.incr('rss_parser_fallbacks')
+
+        if entries is None:
+            with METRICS.timer('parse_feed'):
+                feed = feedparser.parse(response.content, response_headers={
+                    'content-type': response.headers.get('Content-Type', 'application/rss+xml')
+                })
+            if feed.bozo:
+                print(f"Error parsing feed for {keyword}: {feed.bozo_exception}")
+                METRICS.incr('feed_parse_errors')
+                return []
+            entries = [self._entry_to_dict(entry) for entry in feed.entries]
+
+        if self.feed_cache:
+            self.feed_cache.put(rss_url, response.headers.get('ETag'), response.headers.get('Last-Modified'), entries)
+        return entries
+
+    def _iter_feeds(self, workers, now=None):
+        """Yield (keyword, entries, error) in SEARCH_KEYWORDS order.
+
+        With more than one worker the downloads run in a thread pool, but results
+        are still handed out in keyword order so the merge step stays deterministic.
+        """
+        if workers <= 1:
+            for keyword in SEARCH_KEYWORDS:
+                print(f"Searching for: {keyword}")
+                try:
+                    yield keyword, self._fetch_feed(keyword, now), None
+                except Exception as e:
+                    yield keyword, None, e
+            return
+
+        print(f"Searching {len(SEARCH_KEYWORDS)} keywords with {workers} workers...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(keyword, executor.submit(self._fetch_feed, keyword, now)) for keyword in SEARCH_KEYWORDS]
+            for keyword, future in futures:
+                try:
+                    yield keyword, future.result(), None
+                except Exception as e:
+                    yield keyword, None, e
+
+    def iter_news(self, workers=FETCH_WORKERS):
+        """Yield filtered news items feed by feed, as soon as each feed is parsed.
+
+        Items come out in keyword order (not sorted by date); use fetch_news for
+        the full, sorted list.
+        """
+        found_count = 0
+        now = self.now or datetime.now()
+        cutoff_date = now - timedelta(days=DAYS_LOOKBACK)
         
         print(f"Fetching news since {cutoff_date.strftime('%Y-%m-%d %H:%M:%S')} (Strict 24h window)...")
 
-        for keyword in SEARCH_KEYWORDS:
-            print(f"Searching for: {keyword}")
-            encoded_query = quote(keyword)
-            rss_url = GOOGLE_NEWS_RSS_URL.format(query=encoded_query)
-            
-            try:
-                feed = feedparser.parse(rss_url)
-                
-                if feed.bozo:
-                    print(f"Error parsing feed for {keyword}: {feed.bozo_exception}")
-                    continue
+        for keyword, entries, error in self._iter_feeds(workers, now):
+            if error is not None:
+                print(f"Error fetching news for {keyword}: {error}")
+                METRICS.incr('feed_errors')
+                continue
 
-                for entry in feed.entries:
+            try:
+                for entry in entries:
                     # Parse published date
                     try:
-                        published_parsed = entry.published_parsed
+                        published_parsed = tuple(entry['published_parsed'])
                         published_dt = datetime.fromtimestamp(time.mktime(published_parsed))
                     except Exception as e:
-                        print(f"Error parsing date for {entry.title}: {e}")
+                        print(f"Error parsing date for {entry['title']}: {e}")
+                        METRICS.incr('skipped_bad_date')
                         continue
 
                     # STRICT 24-HOUR FILTER
                     # Calculate time difference
-                    time_diff = datetime.now() - published_dt
+                    time_diff = now - published_dt
                     if time_diff > timedelta(hours=24):
                         # print(f"Skipping old news: {entry.title} ({time_diff})")
+                        METRICS.incr('skipped_old')
                         continue
                         
-                    if entry.link in self.seen_links:
+                    if entry['link'] in self.seen_links:
+                        METRICS.incr('skipped_duplicate')
                         continue
 
-                    source_name = entry.source.title if hasattr(entry, 'source') else 'Unknown'
+                    source_name = entry['source']
                     
                     # FILTER 1: Whitelist Check
-                    if not self.is_allowed_source(source_name, entry.link):
+                    if not self.is_allowed_source(source_name, entry['link']):
                         # print(f"Skipping not allowed source: {source_name}")
+                        METRICS.incr('skipped_source')
                         continue
 
                     # FILTER 2: Excluded Keywords in Title
-                    if self.contains_excluded_keyword(entry.title):
-                        # print(f"Skipping excluded topic: {entry.title}")
+                    if self.contains_excluded_keyword(entry['title']):
+                        # print(f"Skipping excluded topic: {entry['title']}")
+                        METRICS.incr('skipped_excluded_keyword')
                         continue
 
-                    self.seen_links.add(entry.link)
+                    self.seen_links.add(entry['link'])
                     
                     news_item = {
-                        'title': entry.title,
-                        'link': entry.link,
+                        'title': entry['title'],
+                        'link': entry['link'],
                         'published': published_dt,
                         'source': source_name,
-                        'summary': entry.summary if hasattr(entry, 'summary') else '',
+                        'summary': entry['summary'],
                         'keyword': keyword
                     }
-                    all_news.append(news_item)
+                    found_count += 1
+                    yield news_item
                     
             except Exception as e:
                 print(f"Error fetching news for {keyword}: {e}")
+                METRICS.incr('feed_errors')
                 
-        print(f"Total news found (after strict filtering): {len(all_news)}")
+        if self.feed_cache:
+            self.feed_cache.save()
+
+        METRICS.incr('items_fetched', found_count)
+        print(f"Total news found (after strict filtering): {found_count}")
+
+    def fetch_news(self, workers=FETCH_WORKERS):
+        all_news = list(self.iter_news(workers))
         # Sort by date, newest first
         all_news.sort(key=lambda x: x['published'], reverse=True)
         return all_news
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlparse
+from config import HEALTH_FILE, HEALTH_EWMA_ALPHA, HEALTH_TIMEOUT_FACTOR, HEALTH_MIN_TIMEOUT, ARTICLE_TIMEOUT
+from config import HEALTH_BREAKER_FAILURES, HEALTH_CONSENT_THRESHOLD, HEALTH_MIN_SAMPLES
+from config import HEALTH_COOLDOWN_MINUTES, HEALTH_FORGET_DAYS
+
+
+def domain_of(url):
+    """Host of a URL as used for the health record (port kept, "www." dropped)."""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class DomainHealth:
+    """Per-domain record of article downloads: success rate, latency and consent-wall rate.
+
+    Timeouts adapt to each domain's typical latency, and a circuit breaker
+    stops downloads from domains that keep failing or only ever return a
+    consent wall. An open circuit lets a single trial request through once the
+    cooldown has passed. With path=None the record lives in memory only.
+    """
+
+    def __init__(self, path=HEALTH_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.domains = self._load() if path else {}
+        self.dirty = False
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except:
+                return {}
+        return {}
+
+    def _record(self, domain):
+        record = self.domains.get(domain)
+        if record is None:
+            record = self.domains[domain] = {
+                'samples': 0,
+                'success_rate': 1.0,
+                'latency': None,
+                'consent_rate': 0.0,
+                'consecutive_failures': 0,
+                'open_until': 0,
+                'updated': 0
+            }
+        return record
+
+    def _ewma(self, average, value):
+        return value if average is None else average + HEALTH_EWMA_ALPHA * (value - average)
+
+    def allow(self, url):
+        """False while the domain's circuit is open. After the cooldown one caller gets a trial."""
+        domain = domain_of(url)
+        now = time.time()
+        with self.lock:
+            record = self.domains.get(domain)
+            if record is None or not self._is_tripped(record):
+                return True
+            if now < record['open_until']:
+                return False
+            # Half-open: let this request through, hold the others for another cooldown
+            record['open_until'] = now + HEALTH_COOLDOWN_MINUTES * 60
+            self.dirty = True
+            return True
+
+    def _is_tripped(self, record):
+        if record['consecutive_failures'] >= HEALTH_BREAKER_FAILURES:
+            return True
+        return record['samples'] >= HEALTH_MIN_SAMPLES and record['consent_rate'] >= HEALTH_CONSENT_THRESHOLD
+
+    def timeout(self, url):
+        """Download timeout for a domain: a multiple of its usual latency, within bounds."""
+        with self.lock:
+            record = self.domains.get(domain_of(url))
+            latency = record['latency'] if record else None
+        if latency is None:
+            return ARTICLE_TIMEOUT
+        return min(ARTICLE_TIMEOUT, max(HEALTH_MIN_TIMEOUT, latency * HEALTH_TIMEOUT_FACTOR))
+
+    def record_success(self, url, seconds, consent=False):
+        """A page was downloaded (consent=True if it turned out to be only a consent wall)."""
+        with self.lock:
+            record = self._record(domain_of(url))
+            record['samples'] += 1
+            record['success_rate'] = self._ewma(record['success_rate'], 1.0)
+            record['latency'] = round(self._ewma(record['latency'], seconds), 3)
+            record['consent_rate'] = self._ewma(record['consent_rate'], 1.0 if consent else 0.0)
+            record['consecutive_failures'] = 0
+            record['updated'] = int(time.time())
+            self._update_circuit(record)
+
+    def record_failure(self, url):
+        """An article could not be downloaded (after retries)."""
+        with self.lock:
+            record = self._record(domain_of(url))
+            record['samples'] += 1
+            record['success_rate'] = self._ewma(record['success_rate'], 0.0)
+            record['consecutive_failures'] += 1
+            record['updated'] = int(time.time())
+            self._update_circuit(record)
+
+    def _update_circuit(self, record):
+        if self._is_tripped(record):
+            if record['open_until'] <= time.time():
+                record['open_until'] = time.time() + HEALTH_COOLDOWN_MINUTES * 60
+        else:
+            record['open_until'] = 0
+        self.dirty = True
+
+    def open_domains(self):
+        with self.lock:
+            return sorted(domain for domain, record in self.domains.items() if self._is_tripped(record))
+
+    def save(self):
+        """Write the record to disk if anything changed, dropping long unseen domains."""
+        if not self.path:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            cutoff = time.time() - HEALTH_FORGET_DAYS * 86400
+            self.domains = {domain: record for domain, record in self.domains.items() if record['updated'] >= cutoff}
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.domains, f, indent=1)
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except Exception as e:
+                print(f"Error saving domain health: {e}")
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import threading
+from config import HISTORY_FILE, HISTORY_LOG, HISTORY_TTL_DAYS, HISTORY_MAX_ENTRIES
+
+
+class HistoryStore:
+    """Dedupe store shared by main.py and WebGenerator.
+
+    The history is an append-only text log committed by the workflow, one
+    "<timestamp>\\t<S|A>\\t<link>" line per event: S when the fetcher first
+    handed a link to processing (seen_at), A when it was added to the web
+    archive (archived_at). The index (link -> [seen_at, archived_at]) is
+    built when the log is loaded, so membership checks are dict lookups, and
+    a run only appends its new lines, which keeps the daily git diff small.
+    Old links are pruned by age and total size by rewriting the log; feeds
+    only look back 24 hours, so a link older than HISTORY_TTL_DAYS can't come
+    back.
+    """
+
+    def __init__(self, path=HISTORY_LOG):
+        self.path = path
+        self.lock = threading.Lock()
+        self.links = {}  # link -> [seen_at, archived_at]
+        self._load()
+        self._import_legacy_history()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) != 3:
+                    continue  # line cut off by an interrupted write
+                timestamp, kind, link = parts
+                try:
+                    timestamp = float(timestamp)
+                except ValueError:
+                    continue
+                record = self.links.setdefault(link, [None, None])
+                if kind == 'S' and record[0] is None:
+                    record[0] = timestamp
+                elif kind == 'A' and record[1] is None:
+                    record[1] = timestamp
+                    if record[0] is None:
+                        record[0] = timestamp
+
+    def _import_legacy_history(self):
+        """One-time import of the old news_history.json link list, which is removed afterwards."""
+        if not os.path.exists(HISTORY_FILE):
+            return
+        try:
+            with open(HISTORY_FILE, 'r') as f:
+                links = json.load(f)
+        except:
+            return
+        self.mark_seen(links)
+        os.remove(HISTORY_FILE)
+        print(f"Imported {len(links)} links from {HISTORY_FILE}.")
+
+    def _append(self, lines):
+        if not lines:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(lines))
+
+    def count(self):
+        with self.lock:
+            return len(self.links)
+
+    def count_archived(self):
+        with self.lock:
+            return sum(1 for record in self.links.values() if record[1] is not None)
+
+    def is_seen(self, link):
+        """True if the fetcher has already handed this link to processing."""
+        with self.lock:
+            record = self.links.get(link)
+        return record is not None and record[0] is not None
+
+    def is_archived(self, link):
+        """True if the link is already in the web archive."""
+        with self.lock:
+            record = self.links.get(link)
+        return record is not None and record[1] is not None
+
+    def mark_seen(self, links):
+        now = int(time.time())
+        lines = []
+        with self.lock:
+            for link in links:
+                record = self.links.setdefault(link, [None, None])
+                if record[0] is None:
+                    record[0] = now
+                    lines.append(f"{now}\tS\t{link}\n")
+            self._append(lines)
+
+    def mark_archived(self, links):
+        now = int(time.time())
+        lines = []
+        with self.lock:
+            for link in links:
+                record = self.links.setdefault(link, [None, None])
+                if record[1] is None:
+                    if record[0] is None:
+                        record[0] = now
+                    record[1] = now
+                    lines.append(f"{now}\tA\t{link}\n")
+            self._append(lines)
+
+    def prune(self, ttl_days=HISTORY_TTL_DAYS, max_entries=HISTORY_MAX_ENTRIES):
+        """Drop links older than ttl_days, then the oldest ones beyond max_entries."""
+        cutoff = time.time() - ttl_days * 86400
+        with self.lock:
+            count = len(self.links)
+            kept = sorted(((link, record) for link, record in self.links.items() if record[0] >= cutoff),
+                          key=lambda entry: entry[1][0])
+            kept = kept[-max_entries:] if max_entries else []
+            removed = count - len(kept)
+            if removed:
+                self.links = dict(kept)
+                # Drop the pruned links' lines and keep the rest as it was, so
+                # the git diff is just the removed lines
+                tmp_path = self.path + '.tmp'
+                with open(self.path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+                    for line in src:
+                        parts = line.rstrip('\n').split('\t', 2)
+                        if len(parts) == 3 and parts[2] in self.links:
+                            dst.write(line)
+                os.replace(tmp_path, self.path)
+        if removed:
+            print(f"Pruned {removed} old links from history.")
+        return removed
@@ -1,90 +1,133 @@
 import os
 import sys
-import json
+import argparse
 from fetcher import NewsFetcher
 from processor import NewsProcessor
 from reporter import PDFReporter
 from web_generator import WebGenerator
+from publisher import Publisher
+from pipeline import buffered
+from clustering import IncidentClusterer
 from datetime import datetime
-from config import HISTORY_FILE
+from history import HistoryStore
+from metrics import METRICS
+from config import METRICS_FILE, METRICS_PROMETHEUS_FILE, CHECKPOINT_FILE
+from recorder import HttpRecorder
+from checkpoint import CheckpointJournal
 
-def load_history():
-    if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, 'r') as f:
-                return set(json.load(f))
-        except:
-            return set()
-    return set()
-
-def save_history(history_set):
-    try:
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(list(history_set), f)
-    except Exception as e:
-        print(f"Error saving history: {e}")
+def main(recorder=None):
+    """Run the whole pipeline.
 
-def main():
+    With a recorder (--record/--replay) the caches, the checkpoint journal and
+    the history check are bypassed, so a recording holds every request of the
+    run. A replay only runs fetch and processing (with the clock frozen at the
+    recording time) and leaves history, site and reports untouched.
+    """
     print(f"--- Austria Safety News Reporter Started at {datetime.now()} ---")
     
     # Check if running in GitHub Actions
     is_github_action = os.getenv('GITHUB_ACTIONS') == 'true'
+    replaying = recorder is not None and recorder.mode == 'replay'
     
     # Load history (Local Deduplication)
-    history = load_history()
-    print(f"Loaded {len(history)} items from history.")
+    history = None
+    if not replaying:
+        history = HistoryStore()
+        print(f"Loaded {history.count()} items from history.")
 
-    # 1. Fetch News
-    try:
-        fetcher = NewsFetcher()
-        news_items = fetcher.fetch_news()
-        
-        # Deduplication for New Processing
-        new_items = []
+    # 1. Fetch -> Deduplicate -> Cluster -> 2. Process (Translate & Summarize), as one stream
+    # Items flow to scraping as soon as their keyword feed is parsed, so the
+    # fetch and processing network waits overlap. Each stage hands items over
+    # through a bounded buffer.
+    new_links = []
+
+    def new_items(news_items):
         for item in news_items:
-            # We check if link is in local history OR if we want to re-process for web
-            # The web generator uses data/archive.json, but main.py uses news_history.json
-            # Ideally they should be synced or unified. 
-            # For now, we rely on news_history.json to avoid re-translating (costly/slow).
-            if item['link'] not in history:
-                new_items.append(item)
-        
-        print(f"Found {len(new_items)} new items after deduplication.")
-        
-    except Exception as e:
-        print(f"Critical Error in Fetcher: {e}")
-        return
+            # The history store is shared with WebGenerator; links seen on an
+            # earlier run are skipped to avoid re-translating (costly/slow).
+            if recorder is not None or not history.is_seen(item['link']):
+                new_links.append(item['link'])
+                yield item
+            else:
+                METRICS.incr('skipped_seen')
+
+    # Items processed by an interrupted earlier run are taken from the journal
+    journal = CheckpointJournal(path=None if recorder is not None else CHECKPOINT_FILE)
+    resumed = []
+
+    def unfinished(representatives):
+        for item in representatives:
+            processed_item = journal.get(item['link'])
+            if processed_item is not None:
+                resumed.append(processed_item)
+            else:
+                yield item
 
-    # 2. Process News (Translate & Summarize)
     processed_news = []
     try:
-        if new_items:
-            processor = NewsProcessor()
-            processed_news = processor.process_news(new_items)
-            
-            # Update history
-            for item in new_items:
-                history.add(item['link'])
-            save_history(history)
+        fetcher = NewsFetcher(use_cache=recorder is None, now=recorder.recorded_at if replaying else None)
+        processor = NewsProcessor(use_cache=recorder is None)
+        # Only one report per incident is scraped and translated
+        clusterer = IncidentClusterer()
+        representatives = clusterer.iter_representatives(new_items(fetcher.iter_news()))
+        for processed_item in processor.iter_process(buffered(unfinished(representatives))):
+            # An item with a failed translation is kept for this run but not
+            # journaled, so a resumed run translates it again
+            if not processed_item.pop('translation_failed', False):
+                journal.record(processed_item)
+            processed_news.append(processed_item)
+        if resumed:
+            print(f"Resumed {len(resumed)} items from the checkpoint journal.")
+            METRICS.incr('checkpoint_resumed', len(resumed))
+            processed_news.extend(resumed)
+        clusterer.attach_related(processed_news)
+
+        print(f"Found {len(new_links)} new items after deduplication.")
+        if new_links:
+            # Update history (a replay leaves it alone)
+            if history is not None:
+                history.mark_seen(new_links)
         else:
             print("No new items to process.")
+        # Processing is complete and in the history, the journal isn't needed anymore
+        journal.clear()
+
+        # Newest first, as the fetcher used to return them
+        processed_news.sort(key=lambda x: x['published'], reverse=True)
             
     except Exception as e:
-        print(f"Critical Error in Processor: {e}")
+        print(f"Critical Error in Pipeline: {e}")
+        METRICS.incr('pipeline_errors')
+        # Keep the journal, the next run picks up from it
+        journal.close()
+        save_metrics()
+        return
+
+    if replaying:
+        print(f"Replay processed {len(processed_news)} items.")
+        save_metrics(os.path.join(recorder.directory, 'replay_metrics.json'))
         return
 
     # 3. Generate Static Website (Priority)
     print("Generating Static Website...")
-    web_gen = WebGenerator()
-    web_gen.generate_site(processed_news)
+    with METRICS.timer('site'):
+        web_gen = WebGenerator(history)
+        web_gen.generate_site(processed_news)
+
+    # Minify and precompress what gets deployed
+    with METRICS.timer('publish'):
+        Publisher().publish()
+
+    history.prune()
 
 
     # 4. Generate PDF (Optional / Local only)
     if processed_news:
         try:
-            reporter = PDFReporter()
-            pdf_path = reporter.generate_report(processed_news)
-            txt_path = reporter.generate_txt_report(processed_news)
+            with METRICS.timer('report'):
+                reporter = PDFReporter()
+                pdf_path = reporter.generate_report(processed_news)
+                txt_path = reporter.generate_txt_report(processed_news)
             
             if pdf_path and not is_github_action:
                 print(f"PDF Report: {pdf_path}")
@@ -92,8 +135,33 @@ def main():
                 
         except Exception as e:
             print(f"Error in PDF Reporter: {e}")
+            METRICS.incr('report_errors')
 
+    save_metrics()
     print(f"--- Finished at {datetime.now()} ---")
 
+def save_metrics(path=METRICS_FILE):
+    """Write this run's metrics (and the Prometheus textfile, if configured)."""
+    print(METRICS.summary())
+    try:
+        METRICS.write_json(path)
+        if METRICS_PROMETHEUS_FILE and path == METRICS_FILE:
+            METRICS.write_prometheus(METRICS_PROMETHEUS_FILE)
+    except Exception as e:
+        print(f"Error writing metrics: {e}")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Austria Safety News Reporter")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--record', metavar='DIR', help="Record every HTTP request of this run into DIR")
+    mode.add_argument('--replay', metavar='DIR', help="Re-run fetch and processing from a recording, without network")
+    args = parser.parse_args()
+
+    if args.record or args.replay:
+        recorder = HttpRecorder(args.record or args.replay, 'record' if args.record else 'replay').start()
+        try:
+            main(recorder)
+        finally:
+            recorder.stop()
+    else:
+        main()
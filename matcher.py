@@ -0,0 +1,58 @@
+import re
+from urllib.parse import urlparse
+
+
+def fold_domain(name):
+    """Turn a source name into the form it takes in a domain (e.g. "Die Presse" -> "diepresse")."""
+    return name.lower().replace(" ", "").replace("ä", "ae").replace("ö", "oe").replace("ü", "ue")
+
+
+class KeywordMatcher:
+    """Case-insensitive substring matcher for a keyword list, compiled into one regex.
+
+    Equivalent to `any(k.lower() in text.lower() for k in keywords)`, but the
+    text is lowercased once and scanned once regardless of the list size.
+    """
+
+    def __init__(self, keywords):
+        lowered = sorted({k.lower() for k in keywords if k}, key=len, reverse=True)
+        self.regex = re.compile("|".join(re.escape(k) for k in lowered)) if lowered else None
+
+    def search(self, text):
+        """Return the (lowercased) keyword found in text, or None."""
+        if not text or self.regex is None:
+            return None
+        match = self.regex.search(text.lower())
+        return match.group(0) if match else None
+
+
+class SourceMatcher:
+    """Whitelist check on the source name and, as a fallback, on the link's domain."""
+
+    def __init__(self, allowed_sources):
+        self.names = KeywordMatcher(allowed_sources)
+        # Precomputed domain form -> source name
+        self.domain_sources = {}
+        for allowed in allowed_sources:
+            self.domain_sources.setdefault(fold_domain(allowed), allowed)
+        self.domains = KeywordMatcher(self.domain_sources.keys())
+        # netloc -> matched source (or None), filled lazily
+        self.domain_table = {}
+
+    def match_domain(self, link):
+        """Return the whitelisted source whose folded name appears in the link's domain."""
+        try:
+            domain = urlparse(link).netloc.lower()
+        except:
+            return None
+        if domain not in self.domain_table:
+            key = self.domains.search(domain)
+            self.domain_table[domain] = self.domain_sources.get(key) if key else None
+        return self.domain_table[domain]
+
+    def is_allowed(self, source_name, link):
+        if not source_name:
+            return False
+        if self.names.search(source_name):
+            return True
+        return self.match_domain(link) is not None
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the per-host latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metrics:
+    """Stage timers, event counters and per-host latency histograms for one run.
+
+    Timers add up the duration of every call, so for stages running in worker
+    threads the total is work time, not wall-clock time. Safe to use from any thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.timers = {}      # stage -> {'count', 'seconds', 'max'}
+            self.counters = {}    # name -> count
+            self.hosts = {}       # host -> {'count', 'seconds', 'buckets'}
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            timer = self.timers.setdefault(stage, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            timer['count'] += 1
+            timer['seconds'] += seconds
+            timer['max'] = max(timer['max'], seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the body of a with block as one call of stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def incr(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe_host(self, url, seconds):
+        """Record one request to the host of url (a URL or a bare host name)."""
+        host = urlparse(url).netloc.lower() if '://' in url else url.lower()
+        with self.lock:
+            record = self.hosts.setdefault(host, {'count': 0, 'seconds': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS)})
+            record['count'] += 1
+            record['seconds'] += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    record['buckets'][i] += 1
+
+    def snapshot(self):
+        """Everything recorded so far as a JSON serializable dict."""
+        with self.lock:
+            return {
+                'started_at': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+                'run_seconds': round(time.time() - self.started, 3),
+                'stages': {stage: {'count': timer['count'],
+                                   'seconds': round(timer['seconds'], 4),
+                                   'max_seconds': round(timer['max'], 4)}
+                           for stage, timer in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'hosts': {host: {'count': record['count'],
+                                 'seconds': round(record['seconds'], 4),
+                                 'buckets': {str(bound): count for bound, count in zip(LATENCY_BUCKETS, record['buckets'])}}
+                          for host, record in sorted(self.hosts.items())},
+            }
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def write_json(self, path):
+        self._write(path, json.dumps(self.snapshot(), indent=2, ensure_ascii=False))
+
+    def write_prometheus(self, path, prefix='news_reporter'):
+        """Write the metrics in the Prometheus text format (for node_exporter's textfile collector)."""
+        data = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_run_seconds Duration of the last run.",
+            f"# TYPE {prefix}_run_seconds gauge",
+            f"{prefix}_run_seconds {data['run_seconds']}",
+            f"# HELP {prefix}_stage_seconds_total Time spent per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for stage, timer in data['stages'].items():
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {timer["seconds"]}')
+        lines.append(f"# TYPE {prefix}_stage_calls_total counter")
+        for stage, timer in data['stages'].items():
+            lines.append(f'{prefix}_stage_calls_total{{stage="{stage}"}} {timer["count"]}')
+        lines.append(f"# HELP {prefix}_events_total Cache hits, filtered items, fallbacks and errors.")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, count in data['counters'].items():
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {count}')
+        lines.append(f"# HELP {prefix}_host_request_seconds Request latency per host.")
+        lines.append(f"# TYPE {prefix}_host_request_seconds histogram")
+        for host, record in data['hosts'].items():
+            for bound, count in record['buckets'].items():
+                lines.append(f'{prefix}_host_request_seconds_bucket{{host="{host}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_host_request_seconds_bucket{{host="{host}",le="+Inf"}} {record["count"]}')
+            lines.append(f'{prefix}_host_request_seconds_sum{{host="{host}"}} {record["seconds"]}')
+            lines.append(f'{prefix}_host_request_seconds_count{{host="{host}"}} {record["count"]}')
+        self._write(path, "\n".join(lines) + "\n")
+
+    def summary(self):
+        """One line per stage, for the end-of-run log."""
+        data = self.snapshot()
+        lines = [f"{stage}: {timer['seconds']:.2f}s over {timer['count']} calls"
+                 for stage, timer in data['stages'].items()]
+        if data['counters']:
+            lines.append(", ".join(f"{name}={count}" for name, count in data['counters'].items()))
+        return "\n".join(lines)
+
+
+# Shared by every pipeline stage of the run
+METRICS = Metrics()
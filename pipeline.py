@@ -0,0 +1,86 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import PIPELINE_BUFFER
+
+# Markers passed through the stage queues next to the items
+_ITEM = 0
+_DONE = 1
+_ERROR = 2
+
+
+def buffered(iterable, maxsize=PIPELINE_BUFFER):
+    """Run an iterable in its own thread and yield its items through a bounded queue.
+
+    The producer blocks once maxsize items are waiting, so a fast stage can never
+    run more than maxsize items ahead of the one consuming it. Exceptions raised by
+    the producer are re-raised in the consumer.
+    """
+    q = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(message):
+        while not stop.is_set():
+            try:
+                q.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((_ITEM, item)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_ERROR, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = q.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        # Consumer finished or gave up: let the producer exit
+        stop.set()
+
+
+def ordered_map(fn, iterable, workers, window=None):
+    """Like executor.map, but pulls from iterable lazily with at most `window` calls in flight.
+
+    Results are yielded in input order.
+    """
+    if workers <= 1:
+        for item in iterable:
+            yield fn(item)
+        return
+
+    window = window or workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in iterable:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def chunked(iterable, size):
+    """Group an iterable into lists of up to size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -1,71 +1,315 @@
 from deep_translator import GoogleTranslator
 from datetime import datetime
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+import os
 import requests
+import urllib3
 import re
+import threading
+import time
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import trafilatura
+from trafilatura.utils import load_html
+from urllib.parse import urlparse
 from googlenewsdecoder import new_decoderv1
+from config import PROCESS_WORKERS, PER_HOST_CONCURRENCY, TRANSLATION_CHUNK_ITEMS, ARTICLE_TIMEOUT, ARTICLE_MAX_BYTES
+from config import SCRAPE_RETRIES, SCRAPE_BACKOFF, EXTRACT_WORKERS, DECODE_CONCURRENCY
+from pipeline import ordered_map, chunked
+from cache import DecodeCache, TranslationCache, google_article_id
+from translation import ThreadLocalTranslator, CachedTranslator, BatchTranslator
+from metrics import METRICS
+from health import DomainHealth
+from extractors import EXTRACTORS
+
+# Responses worth another attempt (rate limiting, server trouble)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+COOKIE_KEYWORDS = [
+    "cookie", "cookies", "consent", "zustimmen", "akzeptieren", 
+    "datenschutz", "privacy policy", "allow all", "alle akzeptieren",
+    "wir verwenden cookies", "diese webseite verwendet cookies",
+    "personal data", "partners", "advertising", "werbung"
+]
+
+def is_cookie_consent_text(text):
+    """Check if the text looks like a cookie consent banner."""
+    if not text:
+        return False
+    
+    # Check for high density of cookie keywords
+    lower_text = text.lower()
+    keyword_count = 0
+    for kw in COOKIE_KEYWORDS:
+        if kw in lower_text:
+            keyword_count += 1
+    
+    # If text is short and has cookie keywords, it's likely a banner
+    if len(text) < 500 and keyword_count >= 2:
+        return True
+        
+    # If text starts with typical cookie phrases
+    if lower_text.strip().startswith("wir verwenden cookies") or \
+       lower_text.strip().startswith("diese webseite verwendet"):
+        return True
+        
+    return False
+
+def extract_text(html, url=None):
+    """Extract the article text from a page. Returns (text, method).
+
+    Pages of the outlets in EXTRACTORS are read with their site extractor
+    (method = extractor name); everything else (and pages it can't read) goes
+    through trafilatura, falling back to the page's <p> tags ('paragraphs').
+    The page is parsed only once.
+    """
+    tree = load_html(html)
+    if tree is None:
+        return None, None
+
+    extractor = EXTRACTORS.for_url(url) if url else None
+    if extractor is not None:
+        result = extractor.extract(tree)
+        if result:
+            return result, extractor.name
+
+    # Extract with trafilatura
+    result = trafilatura.extract(tree, include_comments=False, include_tables=False, no_fallback=False)
+    method = 'trafilatura'
+    
+    # Fallback to the page's paragraphs
+    if not result or len(result) < 100:
+        # Try to find the main article body using common classes/tags
+        # This is hard to generalize, but we can try 'article', 'main', or just all 'p'
+        
+        # Heuristic: Get all p tags, filter by length
+        content = []
+        for p in tree.iter('p'):
+            text = p.text_content().strip()
+            if len(text) > 60 and not is_cookie_consent_text(text):
+                content.append(text)
+        
+        if content:
+            result = "\n".join(content[:10]) # Take more paragraphs for fallback
+            method = 'paragraphs'
+    return result, method
+
+def extract_article(html, url=None):
+    """Turn a downloaded page into the summary text used for translation.
+
+    Runs in the extraction worker processes, so only the summary (or None)
+    and the extraction method ('consent' / 'empty' when rejected) are sent back.
+    """
+    result, method = extract_text(html, url)
+    if not result:
+        return None, 'empty'
+
+    # Check for cookie consent garbage
+    if is_cookie_consent_text(result):
+        return None, 'consent'
+        
+    # Limit length for summary
+    paragraphs = result.split('\n')
+    summary_text = ""
+    for p in paragraphs:
+        if len(summary_text) + len(p) > 1000:
+            break
+        if len(p.strip()) > 30:
+            summary_text += p.strip() + " "
+    
+    return summary_text.strip(), method
 
 class NewsProcessor:
-    def __init__(self):
-        self.translator = GoogleTranslator(source='auto', target='ko')
+    def __init__(self, use_cache=True):
+        self.translator = BatchTranslator(ThreadLocalTranslator(lambda: GoogleTranslator(source='auto', target='ko')))
+        self.translation_cache = TranslationCache() if use_cache else None
+        if self.translation_cache:
+            self.translator = CachedTranslator(self.translator, self.translation_cache, source='auto', target='ko')
         # Trafilatura handles requests internally, but we can keep session if needed later.
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        # HTML extraction runs in separate processes, started on first use
+        self.extract_workers = EXTRACT_WORKERS if EXTRACT_WORKERS is not None else (os.cpu_count() or 1)
+        self.extract_pool = None
+        self.extract_pool_lock = threading.Lock()
+        # One semaphore per host, so parallel workers stay polite to each outlet
+        self.host_slots = {}
+        self.host_slots_lock = threading.Lock()
+        # Every item is decoded through news.google.com, which gets its own limit
+        self.decode_slots = threading.BoundedSemaphore(DECODE_CONCURRENCY)
+        self.decode_cache = DecodeCache() if use_cache else None
+        # Adaptive timeouts and circuit breaker per outlet (kept in memory only without caches)
+        self.health = DomainHealth() if use_cache else DomainHealth(path=None)
+
+    def _host_slot(self, url):
+        """Return the semaphore limiting concurrent requests to the host of url."""
+        host = urlparse(url).netloc.lower()
+        with self.host_slots_lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(PER_HOST_CONCURRENCY)
+            return self.host_slots[host]
 
     def clean_text(self, text):
         """Remove HTML tags and extra whitespace."""
         if not text:
             return ""
         # Trafilatura already returns clean text, but extra safety
-        soup = BeautifulSoup(text, "html.parser")
-        return soup.get_text(separator=" ").strip()
-
-    def is_cookie_consent_text(self, text):
-        """Check if the text looks like a cookie consent banner."""
-        if not text:
-            return False
-        
-        cookie_keywords = [
-            "cookie", "cookies", "consent", "zustimmen", "akzeptieren", 
-            "datenschutz", "privacy policy", "allow all", "alle akzeptieren",
-            "wir verwenden cookies", "diese webseite verwendet cookies",
-            "personal data", "partners", "advertising", "werbung"
-        ]
-        
-        # Check for high density of cookie keywords
-        lower_text = text.lower()
-        keyword_count = 0
-        for kw in cookie_keywords:
-            if kw in lower_text:
-                keyword_count += 1
-        
-        # If text is short and has cookie keywords, it's likely a banner
-        if len(text) < 500 and keyword_count >= 2:
-            return True
-            
-        # If text starts with typical cookie phrases
-        if lower_text.strip().startswith("wir verwenden cookies") or \
-           lower_text.strip().startswith("diese webseite verwendet"):
-            return True
-            
-        return False
+        try:
+            fragment = lxml_html.fragment_fromstring(text, create_parent='div')
+        except (etree.ParserError, ValueError):
+            return text.strip()
+        return " ".join(fragment.itertext()).strip()
 
     def resolve_redirect(self, url):
         """Resolve Google News redirect to get the real article URL using googlenewsdecoder."""
         if "news.google.com" not in url:
             return url
+
+        article_id = google_article_id(url)
+        if self.decode_cache:
+            hit, decoded_url = self.decode_cache.get(article_id)
+            if hit:
+                METRICS.incr('decode_cache_hits')
+                return decoded_url or url
             
         try:
-            decoded = new_decoderv1(url)
+            with self.decode_slots, METRICS.timer('decode'):
+                decoded = new_decoderv1(url)
             if decoded.get("status"):
-                return decoded["decoded_url"]
-            return url
+                decoded_url = decoded["decoded_url"]
+            else:
+                METRICS.incr('decode_failures')
+                decoded_url = None
         except Exception as e:
             # print(f"Error resolving redirect for {url}: {e}")
-            return url
+            METRICS.incr('decode_errors')
+            decoded_url = None
+
+        if self.decode_cache:
+            self.decode_cache.put(article_id, decoded_url)
+        return decoded_url or url
+
+    def download_page(self, url, timeout=ARTICLE_TIMEOUT):
+        """Download an HTML page, reading at most ARTICLE_MAX_BYTES.
+
+        timeout bounds every socket read and the whole download: the body is
+        read with read1(), which returns whatever has arrived, so the deadline
+        is checked after every read and a server trickling data can't hold a
+        worker. A server that goes silent is cut off by the read timeout, so a
+        download never takes much more than twice timeout.
+        Raises requests.HTTPError for any status but 200 and requests.Timeout
+        past the deadline; None if the response isn't HTML.
+        """
+        deadline = time.monotonic() + timeout
+        response = self.session.get(url, timeout=timeout, stream=True)
+        try:
+            if response.status_code != 200:
+                raise requests.HTTPError(f"HTTP {response.status_code} for {url}", response=response)
+            content_type = response.headers.get('Content-Type', '').lower()
+            if content_type and 'html' not in content_type:
+                METRICS.incr('scrape_not_html')
+                return None
+
+            chunks = []
+            size = 0
+            while size < ARTICLE_MAX_BYTES:
+                if time.monotonic() > deadline:
+                    METRICS.incr('scrape_deadline_exceeded')
+                    raise requests.Timeout(f"Download of {url} took longer than {timeout:.1f}s")
+                # Same mapping of urllib3 errors as Response.iter_content
+                try:
+                    chunk = response.raw.read1(64 * 1024, decode_content=True)
+                except urllib3.exceptions.ReadTimeoutError as e:
+                    raise requests.Timeout(e)
+                except urllib3.exceptions.ProtocolError as e:
+                    raise requests.ConnectionError(e)
+                except urllib3.exceptions.DecodeError as e:
+                    raise requests.exceptions.ContentDecodingError(e)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+                size += len(chunk)
+            METRICS.incr('scrape_truncated')
+            return b"".join(chunks)[:ARTICLE_MAX_BYTES]
+        finally:
+            response.close()
+
+    def fetch_page(self, url):
+        """Download an article page with its domain's timeout, retrying transient errors.
+
+        Returns (html, seconds); html is None if the domain's circuit is open or
+        every attempt failed. Only failures that point at the domain (timeouts,
+        connection errors, 429 and 5xx) are recorded in the domain health here;
+        a 404 or 403 is about the article. Successes are recorded by the caller
+        once it knows whether the page was a consent wall.
+        """
+        if not self.health.allow(url):
+            METRICS.incr('scrape_circuit_open')
+            return None, None
+
+        for attempt in range(SCRAPE_RETRIES + 1):
+            if attempt:
+                METRICS.incr('scrape_retries')
+                # Exponential backoff with jitter, without holding the host slot
+                time.sleep(SCRAPE_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            try:
+                with self._host_slot(url), METRICS.timer('scrape'):
+                    started = time.perf_counter()
+                    html = self.download_page(url, timeout=self.health.timeout(url))
+                    seconds = time.perf_counter() - started
+                METRICS.observe_host(url, seconds)
+                return html, seconds
+            except requests.HTTPError as e:
+                METRICS.incr('scrape_http_errors')
+                if e.response is None or e.response.status_code not in RETRY_STATUSES:
+                    # The server answered: a dead or forbidden link, not a sick domain
+                    return None, None
+            except (requests.ConnectionError, requests.Timeout):
+                METRICS.incr('scrape_timeouts')
+
+        self.health.record_failure(url)
+        return None, None
+
+    def _extract_pool(self):
+        with self.extract_pool_lock:
+            if self.extract_pool is None:
+                # spawn: forking a process full of scraping threads isn't safe
+                self.extract_pool = ProcessPoolExecutor(max_workers=self.extract_workers,
+                                                        mp_context=multiprocessing.get_context('spawn'))
+            return self.extract_pool
+
+    def extract(self, html, url):
+        """Run extract_article in the extraction process pool (in this thread if there is none)."""
+        if self.extract_workers > 1:
+            try:
+                return self._extract_pool().submit(extract_article, html, url).result()
+            except BrokenProcessPool as e:
+                print(f"Extraction pool failed ({e}), extracting in the scraping threads")
+                METRICS.incr('extract_pool_errors')
+                self.extract_workers = 0
+        return extract_article(html, url)
+
+    def _count_extraction(self, url, method):
+        extractor = EXTRACTORS.for_url(url)
+        if extractor is not None:
+            METRICS.incr(f'extractor_{extractor.name}_hits' if method == extractor.name else f'extractor_{extractor.name}_misses')
+        if method == 'paragraphs':
+            METRICS.incr('extract_paragraph_fallbacks')
+        elif method == 'consent':
+            METRICS.incr('cookie_wall_rejections')
+        elif method == 'empty':
+            METRICS.incr('extract_empty')
+
+    def close(self):
+        """Stop the extraction processes (they are started again when needed)."""
+        with self.extract_pool_lock:
+            if self.extract_pool is not None:
+                self.extract_pool.shutdown()
+                self.extract_pool = None
 
     def scrape_article_content(self, url):
         """Attempt to scrape the main content using requests + trafilatura."""
@@ -75,129 +319,188 @@ class NewsProcessor:
             # print(f"Resolved {url} -> {final_url}")
             
             # 1. Download with requests (better User-Agent handling)
-            response = self.session.get(final_url, timeout=10) # Increased timeout
-            if response.status_code != 200:
+            html, seconds = self.fetch_page(final_url)
+            if not html:
                 return None
             
-            # 2. Extract with trafilatura
-            result = trafilatura.extract(response.content, include_comments=False, include_tables=False, no_fallback=False)
+            # 2. Extract (in the process pool, CPU bound)
+            with METRICS.timer('extract'):
+                summary_text, method = self.extract(html, final_url)
+            self.health.record_success(final_url, seconds, consent=method == 'consent')
+            self._count_extraction(final_url, method)
+            return summary_text
             
-            # 3. Fallback to simple BeautifulSoup
-            if not result or len(result) < 100:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                # Try to find the main article body using common classes/tags
-                # This is hard to generalize, but we can try 'article', 'main', or just all 'p'
-                
-                # Heuristic: Get all p tags, filter by length
-                paragraphs = soup.find_all('p')
-                content = []
-                for p in paragraphs:
-                    text = p.get_text().strip()
-                    if len(text) > 60 and not self.is_cookie_consent_text(text):
-                        content.append(text)
-                
-                if content:
-                    result = "\n".join(content[:10]) # Take more paragraphs for fallback
+        except Exception as e:
+            # print(f"Scraping failed for {url}: {e}")
+            METRICS.incr('scrape_errors')
+            return None
+
+    def prepare_item(self, item):
+        """Clean the title and get the German summary (scrape or RSS fallback). Returns None on failure."""
+        try:
+            # 1. Handle Title and Source Name
+            original_title = item['title']
+            source_name = item['source']
             
-            if not result:
-                return None
+            # Clean Title: Remove " - Source Name" from the end
+            title_part = original_title
+            # Check if source name is at the end of title
+            if source_name and original_title.endswith(source_name):
+                title_part = original_title.replace(f" - {source_name}", "").strip()
+            elif " - " in original_title:
+                # Fallback split if source name doesn't match exactly
+                parts = original_title.rsplit(" - ", 1)
+                if len(parts) == 2:
+                    title_part = parts[0]
 
-            # Check for cookie consent garbage
-            if self.is_cookie_consent_text(result):
-                return None
-                
-            # Limit length for summary
-            paragraphs = result.split('\n')
-            summary_text = ""
-            for p in paragraphs:
-                if len(summary_text) + len(p) > 1000:
-                    break
-                if len(p.strip()) > 30:
-                    summary_text += p.strip() + " "
+            # 2. Get Summary (Scrape or Fallback)
+            summary_text = self.scrape_article_content(item['link'])
             
-            return summary_text.strip()
+            if not summary_text:
+                # Fallback to RSS summary
+                METRICS.incr('rss_summary_fallbacks')
+                summary_text = item['summary']
+                # RSS summary often has HTML, clean it
+                summary_text = self.clean_text(summary_text)
+                
+                # RSS summary might also end with " - Source Name" or similar
+                if source_name and source_name in summary_text:
+                    summary_text = summary_text.replace(f" - {source_name}", "")
+                    summary_text = summary_text.replace(source_name, "") # Risky but prevents "Small Newspaper"
+
+            # Limit length for translation
+            if len(summary_text) > 1000:
+                summary_text = summary_text[:1000] + "..."
+
+            return {
+                'item': item,
+                'title_part': title_part,
+                'summary_text': summary_text
+            }
             
         except Exception as e:
-            # print(f"Scraping failed for {url}: {e}")
+            print(f"Error processing item {item['title']}: {e}")
+            METRICS.incr('process_errors')
             return None
 
-    def process_news(self, news_items):
-        processed_news = []
-        print(f"Processing {len(news_items)} news items...")
-        
-        for item in news_items:
-            try:
-                # 1. Handle Title and Source Name
-                original_title = item['title']
-                source_name = item['source']
-                
-                # Clean Title: Remove " - Source Name" from the end
-                title_part = original_title
-                # Check if source name is at the end of title
-                if source_name and original_title.endswith(source_name):
-                    title_part = original_title.replace(f" - {source_name}", "").strip()
-                elif " - " in original_title:
-                    # Fallback split if source name doesn't match exactly
-                    parts = original_title.rsplit(" - ", 1)
-                    if len(parts) == 2:
-                        title_part = parts[0]
-
-                # Translate Title
-                try:
-                    title_ko = self.translator.translate(title_part)
-                except:
-                    title_ko = title_part
+    def build_item(self, prepared, title_ko, summary_ko):
+        """Assemble the processed (translated) news item."""
+        item = prepared['item']
+        processed_item = {
+            'original_title': item['title'],
+            'title_ko': title_ko,
+            'link': item['link'],
+            'published': item['published'].strftime('%Y-%m-%d %H:%M:%S') if isinstance(item['published'], datetime) else str(item['published']),
+            'source': item['source'],
+            'summary_ko': summary_ko,
+            'keyword': item['keyword']
+        }
+        print(f"Processed: {title_ko} ({item['source']})")
+        return processed_item
 
-                # 2. Get Summary (Scrape or Fallback)
-                summary_text = self.scrape_article_content(item['link'])
-                
-                if not summary_text:
-                    # Fallback to RSS summary
-                    summary_text = item['summary']
-                    # RSS summary often has HTML, clean it
-                    summary_text = self.clean_text(summary_text)
-                    
-                    # RSS summary might also end with " - Source Name" or similar
-                    if source_name and source_name in summary_text:
-                        summary_text = summary_text.replace(f" - {source_name}", "")
-                        summary_text = summary_text.replace(source_name, "") # Risky but prevents "Small Newspaper"
-
-                # Translate Summary
+    def translate_prepared(self, prepared_items):
+        """Translate titles and summaries of prepared items in as few requests as possible.
+
+        An item whose title or summary couldn't be translated keeps the German
+        title or an empty summary and is marked with 'translation_failed'.
+        """
+        texts = []
+        for prepared in prepared_items:
+            texts.append(prepared['title_part'])
+            texts.append(prepared['summary_text'])
+
+        with METRICS.timer('translate'):
+            translations = self.translator.translate_batch(texts)
+
+        processed_news = []
+        for i, prepared in enumerate(prepared_items):
+            title_ko = translations[2 * i]
+            summary_ko = translations[2 * i + 1]
+            failed = False
+            if title_ko is None:
+                METRICS.incr('translation_failures')
+                title_ko = prepared['title_part']
+                failed = True
+            if summary_ko is None:
+                if prepared['summary_text']:
+                    print(f"Translation error for summary: {prepared['item']['title']}")
+                    METRICS.incr('translation_failures')
+                    failed = True
                 summary_ko = ""
-                if summary_text:
-                    # Clean up any remaining source name occurrences at the end
-                    # (Simple heuristic)
-                    
-                    # Limit length for translation
-                    if len(summary_text) > 1000:
-                        summary_text = summary_text[:1000] + "..."
-                    
-                    try:
-                        summary_ko = self.translator.translate(summary_text)
-                    except Exception as e:
-                        print(f"Translation error for summary: {e}")
-                        summary_ko = ""
-
-                processed_item = {
-                    'original_title': original_title,
-                    'title_ko': title_ko,
-                    'link': item['link'],
-                    'published': item['published'].strftime('%Y-%m-%d %H:%M:%S') if isinstance(item['published'], datetime) else str(item['published']),
-                    'source': source_name,
-                    'summary_ko': summary_ko,
-                    'keyword': item['keyword']
-                }
-                processed_news.append(processed_item)
-                print(f"Processed: {title_ko} ({source_name})")
-                
-            except Exception as e:
-                print(f"Error processing item {item['title']}: {e}")
-                
+            processed_item = self.build_item(prepared, title_ko, summary_ko)
+            if failed:
+                processed_item['translation_failed'] = True
+            processed_news.append(processed_item)
         return processed_news
 
+    def iter_process(self, news_items, workers=PROCESS_WORKERS, chunk_size=TRANSLATION_CHUNK_ITEMS):
+        """Scrape and translate a stream of news items, yielding processed items in input order.
+
+        news_items may be any iterable (e.g. a generator fed by the fetcher).
+        Scraping runs with a bounded number of items in flight, and translations
+        are sent in batches of chunk_size items as soon as they are scraped.
+        """
+        # ordered_map keeps the input order; per-host limits apply inside scrape
+        prepared_items = (p for p in ordered_map(self.prepare_item, news_items, workers) if p is not None)
+
+        for chunk in chunked(prepared_items, chunk_size):
+            for processed_item in self.translate_prepared(chunk):
+                yield processed_item
+
+        self.close()
+        self.health.save()
+        open_domains = self.health.open_domains()
+        if open_domains:
+            print(f"Skipping article downloads (circuit open) for: {', '.join(open_domains)}")
+
+        if self.translation_cache:
+            self.translation_cache.flush()
+            stats = self.translation_cache.stats()
+            METRICS.incr('translation_cache_hits', stats['hits'])
+            METRICS.incr('translation_cache_misses', stats['misses'])
+            print(f"Translation cache: {stats['hits']} hits ({stats['memory_hits']} in memory), {stats['misses']} misses")
+
+    def process_news(self, news_items, workers=PROCESS_WORKERS):
+        print(f"Processing {len(news_items)} news items...")
+        # One chunk for the whole list, so translations are packed as tightly as possible
+        return list(self.iter_process(news_items, workers, chunk_size=max(len(news_items), 1)))
+
 if __name__ == "__main__":
-    # Test with dummy data
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # Check that a server trickling data can't hold a download past its timeout
+    class TricklingHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', '200000')
+            self.end_headers()
+            try:
+                for _ in range(2000):
+                    self.wfile.write(b'x' * 100)
+                    self.wfile.flush()
+                    time.sleep(0.25)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TricklingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
     processor = NewsProcessor()
+    started = time.monotonic()
+    try:
+        processor.download_page(f"http://127.0.0.1:{server.server_port}/", timeout=2)
+        outcome = 'downloaded'
+    except requests.Timeout:
+        outcome = 'timed out'
+    seconds = time.monotonic() - started
+    print(f"{'ok  ' if outcome == 'timed out' and seconds < 3 else 'FAIL'} trickling server: {outcome} after {seconds:.1f}s")
+    server.shutdown()
+
+    # Test with dummy data
     dummy_news = [{
         'title': 'Unfall auf der A1',
         'link': 'http://example.com',
@@ -0,0 +1,173 @@
+import os
+import re
+import gzip
+from config import PUBLISH_COMPRESS_MIN_BYTES, PUBLISH_BROTLI_QUALITY, PUBLISH_REPORT_TOP
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PUBLIC_DIR = 'public'
+COMPRESSIBLE = ('.html', '.json', '.css', '.js', '.svg', '.txt')
+COMPRESSED = ('.gz', '.br')
+
+# Blocks whose whitespace matters and must not be touched
+PROTECTED_RE = re.compile(r'(<(script|style|pre|textarea)\b.*?</\2\s*>)', re.S | re.I)
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+INDENT_RE = re.compile(r'\s*\n\s*')
+SPACES_RE = re.compile(r'[ \t]{2,}')
+OPEN_PROTECTED_RE = re.compile(r'<(script|style|pre|textarea)\b', re.I)
+
+
+def _minify_text(html):
+    parts = PROTECTED_RE.split(html)
+    out = []
+    # split() yields [text, block, tag name, text, block, tag name, ...]
+    for i in range(0, len(parts), 3):
+        text = COMMENT_RE.sub('', parts[i])
+        text = INDENT_RE.sub('\n', text)
+        out.append(SPACES_RE.sub(' ', text))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return ''.join(out)
+
+
+def _safe_cut(buffer):
+    """Length of the start of buffer that minifies the same on its own, or 0.
+
+    That is everything up to the last '>', unless it ends a comment (the
+    whitespace around a dropped comment is merged) or is inside an unfinished
+    comment or protected block.
+    """
+    cut = buffer.rfind('>') + 1
+    if not cut or buffer.endswith('-->', 0, cut):
+        return 0
+    head = buffer[:cut]
+    if head.rfind('<!--') > head.rfind('-->'):
+        return 0
+    if OPEN_PROTECTED_RE.search(PROTECTED_RE.sub('', head)):
+        return 0
+    return cut
+
+
+def iter_minify_html(chunks):
+    """Drop comments and indentation outside <script>/<style>/<pre>/<textarea>.
+
+    Line breaks are kept as a single newline, so inline spacing renders exactly
+    as before. Takes the page as a stream of text chunks (Template.generate())
+    and yields minified text as it goes, holding back only an unfinished tag,
+    comment or protected block.
+    """
+    buffer = ''
+    started = False
+    for chunk in chunks:
+        buffer += chunk
+        cut = _safe_cut(buffer)
+        if not cut:
+            continue
+        text = _minify_text(buffer[:cut])
+        buffer = buffer[cut:]
+        if not started:
+            text = text.lstrip()
+            started = bool(text)
+        if text:
+            yield text
+    text = _minify_text(buffer)
+    if not started:
+        text = text.lstrip()
+    yield text.rstrip() + '\n'
+
+
+class Publisher:
+    """Post-process public/ for deployment.
+
+    Pages and JSON are already written minified by WebGenerator. Here the
+    large artifacts (the archive month shards and search doc blocks, of
+    PUBLISH_COMPRESS_MIN_BYTES or more) get precompressed .gz (and .br, if
+    the brotli package is installed) siblings for hosts that serve them;
+    GitHub Pages compresses on its own. A size report is printed at the end.
+    """
+
+    def __init__(self, public_dir=PUBLIC_DIR, min_bytes=PUBLISH_COMPRESS_MIN_BYTES):
+        self.public_dir = public_dir
+        self.min_bytes = min_bytes
+        self.report = []
+
+    def _write_if_changed(self, path, data):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+        with open(path, 'wb') as f:
+            f.write(data)
+        return True
+
+    def _iter_files(self):
+        for root, dirs, files in os.walk(self.public_dir):
+            for name in files:
+                yield os.path.join(root, name)
+
+    def _compress(self, path):
+        """Write .gz/.br next to path when they are missing or older than the file."""
+        source_mtime = os.path.getmtime(path)
+        variants = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', lambda data: brotli.compress(data, quality=PUBLISH_BROTLI_QUALITY)))
+
+        data = None
+        for suffix, compress in variants:
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                continue
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            self._write_if_changed(target, compress(data))
+
+    def _remove_stale(self, path):
+        """Drop a .gz/.br whose source is gone or now below the size threshold."""
+        source = path[:-3]
+        if not os.path.exists(source) or os.path.getsize(source) < self.min_bytes:
+            os.remove(path)
+
+    def publish(self):
+        for path in list(self._iter_files()):
+            if path.endswith(COMPRESSED):
+                self._remove_stale(path)
+                continue
+            if path.endswith(COMPRESSIBLE) and os.path.getsize(path) >= self.min_bytes:
+                self._compress(path)
+
+        self._collect_report()
+        self.print_report()
+
+    def _collect_report(self):
+        self.report = []
+        for path in self._iter_files():
+            if path.endswith(COMPRESSED):
+                continue
+            sizes = {'path': os.path.relpath(path, self.public_dir), 'raw': os.path.getsize(path)}
+            for suffix in COMPRESSED:
+                if os.path.exists(path + suffix):
+                    sizes[suffix[1:]] = os.path.getsize(path + suffix)
+            self.report.append(sizes)
+        self.report.sort(key=lambda sizes: sizes['raw'], reverse=True)
+
+    def print_report(self, top=PUBLISH_REPORT_TOP):
+        def kb(size):
+            return f"{size / 1024:9.1f}" if size is not None else "        -"
+
+        print(f"{'File':<40} {'raw KB':>9} {'gz KB':>9} {'br KB':>9}")
+        for sizes in self.report[:top]:
+            print(f"{sizes['path'][:40]:<40} {kb(sizes['raw'])} {kb(sizes.get('gz'))} {kb(sizes.get('br'))}")
+        if len(self.report) > top:
+            print(f"... and {len(self.report) - top} smaller files")
+        total_raw = sum(sizes['raw'] for sizes in self.report)
+        # Best variant a client could get for each file
+        total_best = sum(min(sizes['raw'], sizes.get('gz', sizes['raw']), sizes.get('br', sizes['raw'])) for sizes in self.report)
+        print(f"Total: {len(self.report)} files, {total_raw / 1024:.1f} KB raw, {total_best / 1024:.1f} KB compressed")
+
+
+if __name__ == "__main__":
+    Publisher().publish()
@@ -0,0 +1,140 @@
+import os
+import json
+import gzip
+import base64
+import hashlib
+import threading
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+INTERACTIONS_FILE = 'interactions.jsonl.gz'
+META_FILE = 'meta.json'
+
+# Headers that describe the wire format, not the (already decoded) body we store
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+
+class ReplayMissError(requests.exceptions.ConnectionError):
+    """Raised in replay mode for a request that isn't in the recording."""
+
+
+def request_key(request):
+    """Identify a request by method, URL and (for POSTs) a hash of the body."""
+    key = f"{request.method} {request.url}"
+    body = request.body
+    if body:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        key += " " + hashlib.sha1(body).hexdigest()[:16]
+    return key
+
+
+class HttpRecorder:
+    """Record every HTTP exchange made through requests, or replay a recording.
+
+    Works by patching requests.adapters.HTTPAdapter.send, so feeds, the Google
+    News decoder, article downloads and the translator are all covered.
+    Interactions are stored as gzipped JSON lines; on replay, repeated requests
+    for the same key get the recorded responses in order (the last one is
+    reused once they run out).
+    """
+
+    def __init__(self, directory, mode):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.interactions = []     # record mode, in completion order
+        self.responses = {}        # replay mode: key -> [interaction, ...]
+        self.positions = {}        # replay mode: key -> next index
+        self.misses = 0
+        self.recorded_at = datetime.now()
+        self.original_send = None
+
+    def load(self):
+        with open(os.path.join(self.directory, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.recorded_at = datetime.fromisoformat(meta['recorded_at'])
+        with gzip.open(os.path.join(self.directory, INTERACTIONS_FILE), 'rt', encoding='utf-8') as f:
+            for line in f:
+                interaction = json.loads(line)
+                self.responses.setdefault(interaction['key'], []).append(interaction)
+        print(f"Replaying {sum(len(r) for r in self.responses.values())} recorded requests from {self.directory} (recorded at {self.recorded_at}).")
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, INTERACTIONS_FILE)
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+            for interaction in self.interactions:
+                f.write(json.dumps(interaction, ensure_ascii=False, separators=(',', ':')) + "\n")
+        os.replace(path + '.tmp', path)
+        with open(os.path.join(self.directory, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'recorded_at': self.recorded_at.isoformat(), 'requests': len(self.interactions)}, f, indent=2)
+        print(f"Recorded {len(self.interactions)} requests to {self.directory}.")
+
+    def start(self):
+        if self.mode == 'replay':
+            self.load()
+        self.original_send = HTTPAdapter.send
+        recorder = self
+
+        def send(adapter, request, **kwargs):
+            if recorder.mode == 'replay':
+                return recorder._replay(adapter, request)
+            return recorder._record(adapter, request, **kwargs)
+
+        HTTPAdapter.send = send
+        return self
+
+    def stop(self):
+        if self.original_send is not None:
+            HTTPAdapter.send = self.original_send
+            self.original_send = None
+        if self.mode == 'record':
+            self.save()
+        elif self.misses:
+            print(f"Replay: {self.misses} requests were not in the recording.")
+
+    def _record(self, adapter, request, **kwargs):
+        response = self.original_send(adapter, request, **kwargs)
+        # Read the whole body now (even for stream=True) so it can be stored
+        body = response.content
+        with self.lock:
+            self.interactions.append({
+                'key': request_key(request),
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': {name: value for name, value in response.headers.items()
+                            if name.lower() not in DROPPED_HEADERS},
+                'body': base64.b64encode(body or b'').decode('ascii'),
+                'elapsed': response.elapsed.total_seconds(),
+            })
+        return response
+
+    def _replay(self, adapter, request):
+        key = request_key(request)
+        with self.lock:
+            recorded = self.responses.get(key)
+            if not recorded:
+                self.misses += 1
+                raise ReplayMissError(f"Not in recording: {key}", request=request)
+            index = self.positions.get(key, 0)
+            self.positions[key] = index + 1
+            interaction = recorded[min(index, len(recorded) - 1)]
+
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction['reason']
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = base64.b64decode(interaction['body'])
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = adapter
+        response.elapsed = timedelta(seconds=interaction['elapsed'])
+        return response
@@ -7,16 +7,29 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib import colors
 from datetime import datetime
 import os
+import time
 from html import escape
 from config import OUTPUT_DIR, FILENAME_FORMAT, DATE_FORMAT
 
+def format_published(value, fmt='%Y-%m-%d %H:%M'):
+    """Processed items carry 'published' as a string, raw ones as a datetime."""
+    if isinstance(value, datetime):
+        return value.strftime(fmt)
+    return str(value)[:16]
+
 class PDFReporter:
+    # Paragraph styles are built once per process and shared by all reports
+    _styles = None
+
     def __init__(self):
         self.font_path = "NanumGothic-Regular.ttf"
         self.font_name = "NanumGothic"
+        self.timings = {}
         
-        # Register font
-        if os.path.exists(self.font_path):
+        # Register font (once per process)
+        if self.font_name in pdfmetrics.getRegisteredFontNames():
+            pass
+        elif os.path.exists(self.font_path):
             pdfmetrics.registerFont(TTFont(self.font_name, self.font_path))
         else:
             print(f"Warning: Font file {self.font_path} not found. Korean characters may not display correctly.")
@@ -25,7 +38,18 @@ class PDFReporter:
         if not os.path.exists(OUTPUT_DIR):
             os.makedirs(OUTPUT_DIR)
 
+    def get_styles(self):
+        if PDFReporter._styles is None:
+            styles = getSampleStyleSheet()
+            styles.add(ParagraphStyle(name='KoreanTitle', fontName=self.font_name, fontSize=18, leading=22, spaceAfter=20))
+            styles.add(ParagraphStyle(name='KoreanHeading', fontName=self.font_name, fontSize=14, leading=18, spaceAfter=10))
+            styles.add(ParagraphStyle(name='KoreanBody', fontName=self.font_name, fontSize=10, leading=14))
+            styles.add(ParagraphStyle(name='KoreanLink', fontName=self.font_name, fontSize=9, leading=12, textColor=colors.blue))
+            PDFReporter._styles = styles
+        return PDFReporter._styles
+
     def generate_report(self, news_items):
+        started = time.perf_counter()
         date_str = datetime.now().strftime(DATE_FORMAT)
         filename = FILENAME_FORMAT.format(date=date_str) + ".pdf"
         filepath = os.path.join(OUTPUT_DIR, filename)
@@ -34,11 +58,7 @@ class PDFReporter:
                                 rightMargin=72, leftMargin=72,
                                 topMargin=72, bottomMargin=18)
         
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='KoreanTitle', fontName=self.font_name, fontSize=18, leading=22, spaceAfter=20))
-        styles.add(ParagraphStyle(name='KoreanHeading', fontName=self.font_name, fontSize=14, leading=18, spaceAfter=10))
-        styles.add(ParagraphStyle(name='KoreanBody', fontName=self.font_name, fontSize=10, leading=14))
-        styles.add(ParagraphStyle(name='KoreanLink', fontName=self.font_name, fontSize=9, leading=12, textColor=colors.blue))
+        styles = self.get_styles()
         
         story = []
         
@@ -62,7 +82,7 @@ class PDFReporter:
                 # Original Title & Source
                 safe_original = escape(item['original_title'])
                 safe_source = escape(item['source'])
-                meta_text = f"원문: {safe_original} | 출처: {safe_source} | {item['published'].strftime('%Y-%m-%d %H:%M')}"
+                meta_text = f"원문: {safe_original} | 출처: {safe_source} | {format_published(item['published'])}"
                 story.append(Paragraph(meta_text, styles['KoreanBody']))
                 
                 # Summary
@@ -79,14 +99,40 @@ class PDFReporter:
                 story.append(Spacer(1, 20))
                 
         # Build PDF
+        page_times = []
+
+        def on_page(canvas, doc):
+            page_times.append(time.perf_counter())
+
         try:
-            doc.build(story)
+            story_done = time.perf_counter()
+            doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+            build_done = time.perf_counter()
+            self._record_timings(started, story_done, page_times, build_done, filepath)
             print(f"PDF Report generated: {filepath}")
             return filepath
         except Exception as e:
             print(f"Error generating PDF: {e}")
             return None
 
+    def _record_timings(self, started, story_done, page_times, build_done, filepath):
+        """Break doc.build down into layout of the pages and the final write (font subsetting, save)."""
+        pages = len(page_times)
+        last_page = page_times[-1] if page_times else story_done
+        self.timings = {
+            'story': story_done - started,
+            'layout': last_page - story_done,
+            'finalize': build_done - last_page,
+            'total': build_done - started,
+            'pages': pages,
+            'bytes': os.path.getsize(filepath)
+        }
+        t = self.timings
+        per_page = t['layout'] / pages * 1000 if pages else 0
+        print(f"PDF timing: story {t['story']:.2f}s, layout {t['layout']:.2f}s "
+              f"({pages} pages, {per_page:.0f} ms/page), finalize {t['finalize']:.2f}s, "
+              f"total {t['total']:.2f}s, {t['bytes'] / 1024:.0f} KB")
+
     def generate_txt_report(self, news_items):
         date_str = datetime.now().strftime(DATE_FORMAT)
         filename = FILENAME_FORMAT.format(date=date_str) + ".txt"
@@ -105,7 +151,7 @@ class PDFReporter:
                     for i, item in enumerate(news_items, 1):
                         f.write(f"{i}. {item['title_ko']}\n")
                         f.write(f"   원문: {item['original_title']}\n")
-                        f.write(f"   출처: {item['source']} | {item['published'].strftime('%Y-%m-%d %H:%M')}\n")
+                        f.write(f"   출처: {item['source']} | {format_published(item['published'])}\n")
                         if item['summary_ko']:
                             f.write(f"   요약: {item['summary_ko']}\n")
                         f.write(f"   링크: {item['link']}\n")
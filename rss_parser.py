@@ -0,0 +1,88 @@
+import io
+import time
+import email.utils
+from datetime import datetime, timedelta, timezone
+from lxml import etree
+from metrics import METRICS
+
+
+class FeedParseError(Exception):
+    """The document isn't a Google News style RSS feed; use feedparser instead."""
+
+
+def parse_rfc822(value):
+    """Parse an RSS pubDate into a UTC time tuple (as feedparser's published_parsed)."""
+    published = email.utils.parsedate_to_datetime(value.strip())
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.utctimetuple()
+
+
+def parse_google_news(content, now=None, is_allowed=None):
+    """Stream-parse a Google News RSS feed into the fetcher's entry dicts.
+
+    Only title, link, pubDate, source and description are read. Items older
+    than 24 hours (relative to now) or rejected by is_allowed(source_name, link)
+    are dropped before an entry is built, and every parsed <item> is freed
+    right away. Raises FeedParseError on anything unexpected.
+    """
+    cutoff = (now or datetime.now()) - timedelta(hours=24)
+    entries = []
+    root_checked = False
+    try:
+        for event, element in etree.iterparse(io.BytesIO(content), events=('start', 'end'),
+                                              resolve_entities=False, no_network=True):
+            if not root_checked:
+                if element.tag != 'rss':
+                    raise FeedParseError(f"Not an RSS document (root <{element.tag}>)")
+                root_checked = True
+            if event != 'end' or element.tag != 'item':
+                continue
+
+            entry = _parse_item(element, cutoff, is_allowed)
+            if entry is not None:
+                entries.append(entry)
+
+            # Free the item and everything parsed before it
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        raise FeedParseError(str(e))
+    if not root_checked:
+        raise FeedParseError("Empty document")
+    return entries
+
+
+def _parse_item(element, cutoff, is_allowed):
+    title = element.findtext('title')
+    link = element.findtext('link')
+    if title is None or link is None:
+        raise FeedParseError("Item without title or link")
+    link = link.strip()
+
+    pub_date = element.findtext('pubDate')
+    published_parsed = None
+    if pub_date:
+        try:
+            published_parsed = parse_rfc822(pub_date)
+        except (TypeError, ValueError):
+            published_parsed = None
+    # Same check as NewsFetcher.iter_news, which still runs on every entry
+    if published_parsed is not None and datetime.fromtimestamp(time.mktime(published_parsed)) < cutoff:
+        METRICS.incr('skipped_old')
+        return None
+
+    source = element.find('source')
+    source_name = source.text if source is not None and source.text else 'Unknown'
+    if is_allowed is not None and not is_allowed(source_name, link):
+        METRICS.incr('skipped_source')
+        return None
+
+    return {
+        'title': title.strip(),
+        'link': link,
+        'published_parsed': list(published_parsed) if published_parsed else None,
+        'source': source_name,
+        'summary': element.findtext('description') or ''
+    }
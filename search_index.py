@@ -0,0 +1,223 @@
+import os
+import re
+import json
+from config import SEARCH_INDEX_SHARDS, SEARCH_DOC_BLOCK
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Character bigrams of every word (single-character words are kept as is).
+
+    Must match tokenize() in templates/search.html.
+    """
+    tokens = set()
+    for word in WORD_RE.findall((text or '').lower()):
+        if len(word) == 1:
+            tokens.add(word)
+        for i in range(len(word) - 1):
+            tokens.add(word[i:i + 2])
+    return tokens
+
+
+def shard_of(token, shards=SEARCH_INDEX_SHARDS):
+    """32-bit string hash over code points, mirrored by shardOf() in search.html."""
+    h = 0
+    for ch in token:
+        h = (h * 31 + ord(ch)) & 0xffffffff
+    return h % shards
+
+
+def delta_encode(ids, previous=0):
+    """Sorted ids -> gaps, which keeps long posting lists short in JSON.
+
+    previous is the last id already encoded when appending to a list.
+    """
+    out = []
+    for doc_id in ids:
+        out.append(doc_id - previous)
+        previous = doc_id
+    return out
+
+
+class SearchIndexBuilder:
+    """Build the static search index used by search.html.
+
+    Layout under output_dir:
+      meta.json        doc count, shard/block sizes and facet names
+      docs/N.json      blocks of SEARCH_DOC_BLOCK compact doc records
+      idx/N.json       bigram -> delta-encoded doc ids, sharded by token hash
+      facets.json      source / keyword -> delta-encoded doc ids
+
+    Doc ids follow the archive's chronological order, so existing ids and
+    full doc blocks never change when new articles are appended. build()
+    therefore only indexes the articles added since the last build and
+    appends their ids to the posting lists. The index is rebuilt from
+    scratch if its last doc isn't at the same place in the archive any more
+    (the archive is append-only, so that only happens after a migration).
+    """
+
+    def __init__(self, output_dir, shards=SEARCH_INDEX_SHARDS, doc_block=SEARCH_DOC_BLOCK):
+        self.output_dir = output_dir
+        self.shards = shards
+        self.doc_block = doc_block
+
+    def _path(self, *parts):
+        return os.path.join(self.output_dir, *parts)
+
+    def _read_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _write_if_changed(self, path, data):
+        """Write compact JSON only if the file content changes. Returns True if written."""
+        content = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return True
+
+    def _indexed_meta(self, articles):
+        """meta.json of the existing index if articles start with the docs it holds, else None."""
+        meta = self._read_json(self._path('meta.json'))
+        if not meta or meta.get('version') != 1 or meta.get('shards') != self.shards \
+                or meta.get('doc_block') != self.doc_block or meta.get('docs', 0) > len(articles):
+            return None
+        count = meta['docs']
+        if count:
+            # The last indexed doc must still be the same article
+            block = self._read_json(self._path('docs', f"{(count - 1) // self.doc_block}.json"))
+            if not block or block[-1][5] != (articles[count - 1].get('link') or ''):
+                return None
+        return meta
+
+    def _index(self, articles, start, sources, keywords):
+        """Doc records, per-shard postings and facets of articles[start:].
+
+        New sources and keywords are appended to the given name lists.
+        """
+        source_ids = {source: i for i, source in enumerate(sources)}
+        keyword_ids = {keyword: i for i, keyword in enumerate(keywords)}
+        postings = [dict() for _ in range(self.shards)]
+        source_facets = {}
+        keyword_facets = {}
+        docs = []
+
+        for doc_id in range(start, len(articles)):
+            item = articles[doc_id]
+            source = item.get('source') or ''
+            keyword = item.get('keyword') or ''
+            if source not in source_ids:
+                source_ids[source] = len(sources)
+                sources.append(source)
+            if keyword not in keyword_ids:
+                keyword_ids[keyword] = len(keywords)
+                keywords.append(keyword)
+
+            docs.append([
+                item.get('title_ko') or '',
+                item.get('summary_ko') or '',
+                source_ids[source],
+                keyword_ids[keyword],
+                str(item.get('published') or ''),
+                item.get('link') or ''
+            ])
+            source_facets.setdefault(source_ids[source], []).append(doc_id)
+            keyword_facets.setdefault(keyword_ids[keyword], []).append(doc_id)
+
+            text = ' '.join([item.get('title_ko') or '', item.get('summary_ko') or '', source])
+            for token in tokenize(text):
+                postings[shard_of(token, self.shards)].setdefault(token, []).append(doc_id)
+        return docs, postings, source_facets, keyword_facets
+
+    def build(self, articles):
+        """Bring the index up to date with articles in chronological order (oldest first)."""
+        meta = self._indexed_meta(articles)
+        if meta is None:
+            return self.rebuild(articles)
+        if meta['docs'] == len(articles):
+            print(f"Search index: {len(articles)} docs, up to date.")
+            return 0
+
+        start = meta['docs']
+        sources = meta['sources']
+        keywords = meta['keywords']
+        docs, postings, source_facets, keyword_facets = self._index(articles, start, sources, keywords)
+
+        # The last block may be partly filled: complete it with the new docs
+        first_block = start // self.doc_block
+        if start % self.doc_block:
+            block = self._read_json(self._path('docs', f"{first_block}.json"))
+            if block is None:
+                return self.rebuild(articles)
+            docs = block[:start % self.doc_block] + docs
+        written = 0
+        for offset in range(0, len(docs), self.doc_block):
+            path = self._path('docs', f"{first_block + offset // self.doc_block}.json")
+            written += self._write_if_changed(path, docs[offset:offset + self.doc_block])
+
+        # Append the new ids to the posting lists of the shards they touch
+        for shard, tokens in enumerate(postings):
+            if not tokens:
+                continue
+            path = self._path('idx', f"{shard}.json")
+            index = self._read_json(path)
+            if index is None:
+                return self.rebuild(articles)
+            for token, ids in tokens.items():
+                gaps = index.get(token, [])
+                index[token] = gaps + delta_encode(ids, sum(gaps))
+            written += self._write_if_changed(path, index)
+
+        facets = self._read_json(self._path('facets.json'))
+        if facets is None:
+            return self.rebuild(articles)
+        for name, new_facets, names in (('source', source_facets, sources), ('keyword', keyword_facets, keywords)):
+            lists = facets[name] + [[] for _ in range(len(names) - len(facets[name]))]
+            for i, ids in new_facets.items():
+                lists[i] = lists[i] + delta_encode(ids, sum(lists[i]))
+            facets[name] = lists
+        written += self._write_if_changed(self._path('facets.json'), facets)
+        written += self._write_meta(len(articles), sources, keywords)
+        print(f"Search index: {len(articles)} docs ({len(articles) - start} added), {written} files updated.")
+        return written
+
+    def rebuild(self, articles):
+        """Build the whole index from articles in chronological order (oldest first)."""
+        sources = []
+        keywords = []
+        docs, postings, source_facets, keyword_facets = self._index(articles, 0, sources, keywords)
+
+        written = 0
+        for block in range(0, len(docs), self.doc_block):
+            path = self._path('docs', f"{block // self.doc_block}.json")
+            written += self._write_if_changed(path, docs[block:block + self.doc_block])
+
+        for shard, tokens in enumerate(postings):
+            path = self._path('idx', f"{shard}.json")
+            written += self._write_if_changed(path, {token: delta_encode(ids) for token, ids in tokens.items()})
+
+        written += self._write_if_changed(self._path('facets.json'), {
+            'source': [delta_encode(source_facets.get(i, [])) for i in range(len(sources))],
+            'keyword': [delta_encode(keyword_facets.get(i, [])) for i in range(len(keywords))]
+        })
+        written += self._write_meta(len(docs), sources, keywords)
+        print(f"Search index: {len(docs)} docs rebuilt, {written} files updated.")
+        return written
+
+    def _write_meta(self, count, sources, keywords):
+        return self._write_if_changed(self._path('meta.json'), {
+            'version': 1,
+            'docs': count,
+            'doc_block': self.doc_block,
+            'shards': self.shards,
+            'sources': sources,
+            'keywords': keywords
+        })
@@ -0,0 +1,172 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import TRANSLATION_BATCH_CHARS, TRANSLATION_BATCH_WORKERS
+
+
+class ThreadLocalTranslator:
+    """GoogleTranslator keeps the request text on the instance, so it can't be
+    shared between worker threads. Each thread gets its own instance instead."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.local = threading.local()
+
+    def translate(self, text):
+        translator = getattr(self.local, 'translator', None)
+        if translator is None:
+            translator = self.local.translator = self.factory()
+        return translator.translate(text)
+
+
+class CachedTranslator:
+    """Wrap a translator with a TranslationCache lookup. Only successful translations are stored."""
+
+    def __init__(self, translator, cache, source='auto', target='ko'):
+        self.translator = translator
+        self.cache = cache
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        if not text or not text.strip():
+            return self.translator.translate(text)
+
+        cached = self.cache.get(text, self.source, self.target)
+        if cached is not None:
+            return cached
+
+        translated = self.translator.translate(text)
+        if translated:
+            self.cache.put(text, self.source, self.target, translated)
+        return translated
+
+    def translate_batch(self, texts):
+        """Answer what we can from the cache and send only the misses (once each) to the translator."""
+        results = [None] * len(texts)
+        missing = {}
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = text
+                continue
+            cached = self.cache.get(text, self.source, self.target)
+            if cached is not None:
+                results[i] = cached
+            else:
+                missing.setdefault(text, []).append(i)
+
+        if missing:
+            miss_texts = list(missing)
+            if hasattr(self.translator, 'translate_batch'):
+                translated = self.translator.translate_batch(miss_texts)
+            else:
+                translated = []
+                for text in miss_texts:
+                    try:
+                        translated.append(self.translator.translate(text))
+                    except Exception as e:
+                        print(f"Translation error: {e}")
+                        translated.append(None)
+            for text, value in zip(miss_texts, translated):
+                if value:
+                    self.cache.put(text, self.source, self.target, value)
+                for i in missing[text]:
+                    results[i] = value
+        return results
+
+
+class BatchTranslator:
+    """Pack many segments into a single translator request.
+
+    Segments are joined with numbered markers ("[[0]] ...", "[[1]] ...") that
+    survive translation, and the result is split back on those markers. If the
+    markers come back mangled the batch is retried one segment at a time.
+    """
+
+    MARKER = "[[{}]]"
+    MARKER_RE = re.compile(r"\[\s*\[\s*(\d+)\s*\]\s*\]")
+
+    def __init__(self, translator, max_chars=TRANSLATION_BATCH_CHARS, workers=TRANSLATION_BATCH_WORKERS):
+        self.translator = translator
+        self.max_chars = max_chars
+        self.workers = workers
+
+    def translate(self, text):
+        return self.translator.translate(text)
+
+    def _translate_single(self, text):
+        try:
+            return self.translator.translate(text)
+        except Exception as e:
+            print(f"Translation error: {e}")
+            return None
+
+    def _pack(self, texts):
+        """Group indices of non-empty texts into batches that fit max_chars."""
+        batches = []
+        current = []
+        size = 0
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            cost = len(text) + len(self.MARKER.format(len(current))) + 2
+            if current and size + cost > self.max_chars:
+                batches.append(current)
+                current = []
+                size = 0
+                cost = len(text) + len(self.MARKER.format(0)) + 2
+            current.append(i)
+            size += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _split(self, translated, count):
+        """Split a translated batch on its markers; None if they didn't survive."""
+        if not translated:
+            return None
+        parts = self.MARKER_RE.split(translated)
+        # parts = [prefix, "0", text0, "1", text1, ...]
+        if parts[0].strip() or len(parts) != 2 * count + 1:
+            return None
+        segments = []
+        for k in range(count):
+            if int(parts[1 + 2 * k]) != k:
+                return None
+            segments.append(parts[2 + 2 * k].strip())
+        return segments
+
+    def _translate_batch(self, texts, indices):
+        """Translate one packed batch, returning {index: translation or None}."""
+        if len(indices) == 1:
+            return {indices[0]: self._translate_single(texts[indices[0]])}
+
+        joined = "\n".join(f"{self.MARKER.format(k)} {texts[i].strip()}" for k, i in enumerate(indices))
+        segments = None
+        try:
+            segments = self._split(self.translator.translate(joined), len(indices))
+        except Exception as e:
+            print(f"Batch translation error: {e}")
+
+        if segments is None:
+            print(f"Batch of {len(indices)} segments could not be split, translating one by one")
+            return {i: self._translate_single(texts[i]) for i in indices}
+        return dict(zip(indices, segments))
+
+    def translate_batch(self, texts):
+        """Translate a list of texts. Failed segments come back as None, empty ones unchanged."""
+        results = [text if not text or not text.strip() else None for text in texts]
+        batches = self._pack(texts)
+        if not batches:
+            return results
+
+        if self.workers <= 1 or len(batches) == 1:
+            translated = [self._translate_batch(texts, indices) for indices in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                translated = list(executor.map(lambda indices: self._translate_batch(texts, indices), batches))
+
+        for batch in translated:
+            for i, value in batch.items():
+                results[i] = value
+        return results
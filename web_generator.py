@@ -1,61 +1,145 @@
 import os
 import json
+import math
 import shutil
+import hashlib
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from history import HistoryStore
+from search_index import SearchIndexBuilder
+from publisher import iter_minify_html
+from config import ARCHIVE_PAGE_SIZE, BUILD_MANIFEST_FILE, JINJA_CACHE_DIR
+from metrics import METRICS
 
 # Configuration
 TEMPLATE_DIR = 'templates'
 PUBLIC_DIR = 'public'
 DATA_DIR = os.path.join(PUBLIC_DIR, 'data')
-ARCHIVE_FILE = os.path.join(DATA_DIR, 'archive.json')
+# Archive is sharded by month: data/archive/YYYY-MM.json plus a small manifest
+ARCHIVE_DIR = os.path.join(DATA_DIR, 'archive')
+ARCHIVE_MANIFEST = os.path.join(ARCHIVE_DIR, 'manifest.json')
+LEGACY_ARCHIVE_FILE = os.path.join(DATA_DIR, 'archive.json')
+SEARCH_DIR = os.path.join(DATA_DIR, 'search')
+ARCHIVE_PAGES_DIR = 'archive'  # relative to PUBLIC_DIR
 
 class WebGenerator:
-    def __init__(self):
-        self.env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+    def __init__(self, history=None):
+        self.history = history if history is not None else HistoryStore()
+        # Compiled templates are kept between runs
+        os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+        self.env = Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                               bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR))
+        self.build_manifest = self._read_json(BUILD_MANIFEST_FILE, {})
+        self.template_hashes = {}
+        self.render_stats = {'rendered': 0, 'skipped': 0, 'unchanged': 0}
+        self.shards = {}
         self._ensure_dirs()
     
     def _ensure_dirs(self):
         """Ensure public and data directories exist."""
         os.makedirs(PUBLIC_DIR, exist_ok=True)
         os.makedirs(DATA_DIR, exist_ok=True)
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        os.makedirs(os.path.join(PUBLIC_DIR, ARCHIVE_PAGES_DIR), exist_ok=True)
         # Copy styles if exist
         if os.path.exists('public/styles.css'):
             pass # Already in place if we write to public/styles.css
         # If we have static assets in templates/static, copy them (not used yet)
 
-    def load_archive(self):
-        """Load the full history of articles."""
-        if os.path.exists(ARCHIVE_FILE):
+    def _read_json(self, path, default):
+        if os.path.exists(path):
             try:
-                with open(ARCHIVE_FILE, 'r', encoding='utf-8') as f:
+                with open(path, 'r', encoding='utf-8') as f:
                     return json.load(f)
             except:
-                return []
-        return []
+                METRICS.incr('json_read_errors')
+                return default
+        return default
+
+    def _write_json(self, path, data):
+        """Write compact JSON atomically."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def load_manifest(self):
+        """Load the shard list: {"total": n, "shards": [{"month", "file", "count"}, ...]} newest month first."""
+        return self._read_json(ARCHIVE_MANIFEST, {'total': 0, 'shards': []})
+
+    def save_manifest(self, manifest):
+        manifest['shards'].sort(key=lambda shard: shard['month'], reverse=True)
+        manifest['total'] = sum(shard['count'] for shard in manifest['shards'])
+        self._write_json(ARCHIVE_MANIFEST, manifest)
 
-    def save_archive(self, articles):
-        """Save updated archive."""
-        with open(ARCHIVE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(articles, f, ensure_ascii=False, indent=2)
+    def load_shard(self, month):
+        """Load one month of articles, oldest first (append order)."""
+        if month not in self.shards:
+            self.shards[month] = self._read_json(os.path.join(ARCHIVE_DIR, f"{month}.json"), [])
+        return self.shards[month]
+
+    def save_shard(self, month, articles, manifest):
+        """Write one month shard and record it in the manifest."""
+        self.shards[month] = articles
+        self._write_json(os.path.join(ARCHIVE_DIR, f"{month}.json"), articles)
+        manifest['shards'] = [shard for shard in manifest['shards'] if shard['month'] != month]
+        manifest['shards'].append({'month': month, 'file': f"{month}.json", 'count': len(articles)})
+
+    def _migrate_legacy_archive(self):
+        """Split the old monolithic archive.json into month shards (one time)."""
+        if not os.path.exists(LEGACY_ARCHIVE_FILE) or os.path.exists(ARCHIVE_MANIFEST):
+            return
+        legacy = self._read_json(LEGACY_ARCHIVE_FILE, [])
+        manifest = self.load_manifest()
+        by_month = {}
+        # Legacy file is newest first; shards are stored oldest first
+        for item in reversed(legacy):
+            stamp = item.get('fetched_at') or str(item.get('published', ''))
+            month = stamp[:7] if len(stamp) >= 7 else datetime.now().strftime('%Y-%m')
+            by_month.setdefault(month, []).append(item)
+        for month, articles in by_month.items():
+            self.save_shard(month, articles, manifest)
+        self.save_manifest(manifest)
+        os.remove(LEGACY_ARCHIVE_FILE)
+        print(f"Migrated {len(legacy)} archive items into {len(by_month)} monthly shards.")
+
+    def load_archive(self):
+        """Load the full history of articles, newest first."""
+        archive = []
+        for shard in self.load_manifest()['shards']:
+            archive.extend(reversed(self.load_shard(shard['month'])))
+        return archive
 
     def update_archive(self, new_items):
-        """Add new items to the archive, avoiding duplicates."""
-        archive = self.load_archive()
-        existing_links = {item['link'] for item in archive}
+        """Add new items to the current month's shard, avoiding duplicates.
+
+        Only the current shard and the manifest are rewritten.
+        """
+        self._migrate_legacy_archive()
+        manifest = self.load_manifest()
+        if manifest['total'] and not self.history.count_archived():
+            # First run with the history store: index what's already archived
+            self.history.mark_archived(item['link'] for item in self.load_archive())
+
+        month = datetime.now().strftime('%Y-%m')
+        shard = self.load_shard(month)
         
-        added_count = 0
+        added_links = set()
         for item in new_items:
-            if item['link'] not in existing_links:
+            if item['link'] not in added_links and not self.history.is_archived(item['link']):
                 # Add a timestamp if missing
                 if 'fetched_at' not in item:
                     item['fetched_at'] = datetime.now().isoformat()
-                archive.insert(0, item) # Prepend new items
-                added_count += 1
+                shard.append(item) # Newest last within a shard
+                added_links.add(item['link'])
         
-        self.save_archive(archive)
+        if added_links or not os.path.exists(ARCHIVE_MANIFEST):
+            self.save_shard(month, shard, manifest)
+            self.save_manifest(manifest)
+        self.history.mark_archived(added_links)
+        added_count = len(added_links)
         print(f"Added {added_count} items to web archive.")
-        return archive
+        return self.load_archive()
 
     def generate_site(self, current_news):
         """Generate all static pages."""
@@ -72,25 +156,114 @@ class WebGenerator:
             'current_year': datetime.now().year
         })
         
-        # 3. Generate Archive Page
-        self._render_page('archive.html', {
-            'news_items': full_archive,
-            'current_year': datetime.now().year
-        })
+        # 3. Generate Archive Pages
+        self._render_archive_pages(full_archive)
         
-        # 4. Generate Search Page
+        # 4. Build Search Index (doc ids in chronological order)
+        with METRICS.timer('search_index'):
+            SearchIndexBuilder(SEARCH_DIR).build(list(reversed(full_archive)))
+
+        # 5. Generate Search Page
         self._render_page('search.html', {
             'current_year': datetime.now().year
         })
         
+        self._save_build_manifest()
+        stats = self.render_stats
+        print(f"Pages: {stats['rendered']} written, {stats['unchanged']} rendered without changes, {stats['skipped']} skipped.")
         print("Static site generated in 'public/' directory.")
 
-    def _render_page(self, template_name, context):
-        """Render a single template."""
-        template = self.env.get_template(template_name)
-        output = template.render(context)
-        with open(os.path.join(PUBLIC_DIR, template_name), 'w', encoding='utf-8') as f:
-            f.write(output)
+    def _render_archive_pages(self, full_archive):
+        """Render archive.html (latest articles) and the numbered pages under archive/.
+
+        Numbered pages are fixed blocks of ARCHIVE_PAGE_SIZE articles in
+        chronological order (archive/1.html holds the oldest), so appending new
+        articles only changes the last page or two. Every page goes through
+        _render_page, whose input hash (template source + context) skips the
+        unchanged ones and still catches template edits.
+        """
+        chronological = list(reversed(full_archive))
+        total = len(chronological)
+        page_count = max(1, math.ceil(total / ARCHIVE_PAGE_SIZE))
+        current_year = datetime.now().year
+
+        # Page of the oldest article that isn't on archive.html
+        older_page = (total - ARCHIVE_PAGE_SIZE - 1) // ARCHIVE_PAGE_SIZE + 1 if total > ARCHIVE_PAGE_SIZE else None
+        self._render_page('archive.html', {
+            'news_items': full_archive[:ARCHIVE_PAGE_SIZE],
+            'older_url': f"archive/{older_page}.html" if older_page else None,
+            'current_year': current_year
+        })
+
+        rendered = 0
+        for page in range(1, page_count + 1):
+            output_name = os.path.join(ARCHIVE_PAGES_DIR, f"{page}.html")
+            start = (page - 1) * ARCHIVE_PAGE_SIZE
+            rendered += self._render_page('archive.html', {
+                'root': '../',
+                'news_items': list(reversed(chronological[start:start + ARCHIVE_PAGE_SIZE])),
+                'page': page,
+                'newer_url': f"{page + 1}.html" if page < page_count else "../archive.html",
+                'older_url': f"{page - 1}.html" if page > 1 else None,
+                'current_year': current_year
+            }, output_name)
+        print(f"Archive: {page_count} pages, {rendered} updated.")
+
+    def _template_hash(self, template_name):
+        if template_name not in self.template_hashes:
+            source = self.env.loader.get_source(self.env, template_name)[0]
+            self.template_hashes[template_name] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        return self.template_hashes[template_name]
+
+    def _input_hash(self, template_name, context):
+        """Hash of everything a page depends on: template source and context."""
+        digest = hashlib.sha256(self._template_hash(template_name).encode('utf-8'))
+        digest.update(json.dumps(context, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _save_build_manifest(self):
+        try:
+            os.makedirs(os.path.dirname(BUILD_MANIFEST_FILE) or '.', exist_ok=True)
+            self._write_json(BUILD_MANIFEST_FILE, self.build_manifest)
+        except Exception as e:
+            print(f"Error saving build manifest: {e}")
+
+    def _render_page(self, template_name, context, output_name=None):
+        """Stream a single template to disk, minified (see publisher.iter_minify_html).
+
+        Skipped entirely if the page's inputs are unchanged since the last build,
+        and the file is left untouched if the new output is byte-identical.
+        """
+        output_name = output_name or template_name
+        path = os.path.join(PUBLIC_DIR, output_name)
+        input_hash = self._input_hash(template_name, context)
+        if self.build_manifest.get(output_name) == input_hash and os.path.exists(path):
+            self.render_stats['skipped'] += 1
+            METRICS.incr('pages_skipped')
+            return False
+
+        with METRICS.timer('render'):
+            template = self.env.get_template(template_name)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(iter_minify_html(template.generate(context)))
+        self.build_manifest[output_name] = input_hash
+
+        if os.path.exists(path) and self._same_file(tmp_path, path):
+            os.remove(tmp_path)
+            self.render_stats['unchanged'] += 1
+            METRICS.incr('pages_unchanged')
+            return False
+        os.replace(tmp_path, path)
+        self.render_stats['rendered'] += 1
+        METRICS.incr('pages_written')
+        return True
+
+    def _same_file(self, path_a, path_b):
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        with open(path_a, 'rb') as a, open(path_b, 'rb') as b:
+            return a.read() == b.read()
 
 if __name__ == "__main__":
     # Test run